@@ -1,19 +1,44 @@
 anomaly_detector_content = """# anomaly_detector.py
+import numpy as np
 import pandas as pd
 from sklearn.ensemble import IsolationForest
 from datetime import datetime
 import os
-
-def load_market_snapshot(snapshot_csv):
-    """Load full market snapshot from CSV."""
+from .coin_metadata import attach_metadata
+from .snapshot_store import read_snapshots, iter_snapshots
+from .dataset_manager import apply_schema, memory_usage_mb
+from .publisher import write_csv_atomic
+
+FEATURE_SOURCE_COLUMNS = ["id", "timestamp", "price_change_percentage_24h"]
+ANOMALY_COLUMNS = ["id", "symbol", "name", "pct_change_24h", "timestamp", "anomaly_score"]
+STREAM_CHUNK_ROWS = 64 * 1024 # Rows held in memory at a time in streaming mode
+FIT_SAMPLE_ROWS = 100_000 # Reservoir the streaming model is fitted on
+
+def load_market_snapshot(snapshot_source, columns=None, start=None):
+    """
+    Load the market snapshot, either from the partitioned Parquet store (a
+    directory) or from a legacy full_market_snapshot.csv.
+
+    Args:
+        snapshot_source (str): Snapshot store directory or CSV path.
+        columns (list, optional): Columns to read. Defaults to all.
+        start (datetime-like, optional): Only rows at or after this UTC time; store only.
+    """
     try:
-        df = pd.read_csv(snapshot_csv, parse_dates=["timestamp"])
+        if os.path.isdir(snapshot_source):
+            # Only the partitions from start onwards and the requested columns are read
+            df = read_snapshots(snapshot_source, columns=columns, start=start)
+        else:
+            df = pd.read_csv(snapshot_source, usecols=columns, parse_dates=["timestamp"])
+        # Snapshot rows only carry the coin key, symbol/name come from the coin dimension
+        df = apply_schema(attach_metadata(df), epoch_timestamps=False)
+        print(f"Loaded {len(df)} snapshot rows ({memory_usage_mb(df):.2f} MB).")
         return df
     except FileNotFoundError:
-        print(f"Error: Market snapshot file not found at {snapshot_csv}.")
+        print(f"Error: Market snapshot file not found at {snapshot_source}.")
         return pd.DataFrame() # Return empty DataFrame on error
     except Exception as e:
-        print(f"Error loading market snapshot from {snapshot_csv}: {e}")
+        print(f"Error loading market snapshot from {snapshot_source}: {e}")
         return pd.DataFrame() # Return empty DataFrame on other errors
 
 
@@ -82,7 +107,8 @@ def save_anomalies(df, output_dir="data"):
     path = os.path.join(output_dir, f"anomalies_{timestamp}.csv")
     os.makedirs(output_dir, exist_ok=True)
     try:
-        anomalies.to_csv(path, index=False)
+        # The dashboard picks up the newest anomalies file, so it must appear complete or not at all
+        write_csv_atomic(anomalies, path)
         print(f"Anomalies saved to {path}")
         return path, anomalies
     except Exception as e:
@@ -90,10 +116,89 @@ def save_anomalies(df, output_dir="data"):
         return None, pd.DataFrame()
 
 
-def detect_anomalies(snapshot_csv, output_dir="data"):
-    """End-to-end anomaly detection workflow."""
-    print(f"Starting anomaly detection from {snapshot_csv}")
-    df = load_market_snapshot(snapshot_csv)
+def iter_snapshot_chunks(snapshot_source, columns=None, start=None, chunk_rows=STREAM_CHUNK_ROWS):
+    """Yields the snapshot in DataFrames of at most chunk_rows rows, projected to columns."""
+    if os.path.isdir(snapshot_source):
+        yield from iter_snapshots(snapshot_source, columns=columns, start=start, batch_rows=chunk_rows)
+        return
+    for chunk in pd.read_csv(snapshot_source, usecols=columns, parse_dates=["timestamp"], chunksize=chunk_rows):
+        if start is not None:
+            # A CSV cannot be pruned, so the time filter is applied per chunk
+            chunk = chunk[pd.to_datetime(chunk["timestamp"], utc=True, errors="coerce") >= start]
+        yield chunk
+
+
+def _chunk_features(chunk):
+    # (id/timestamp keys, float32 pct change) of the rows with a valid feature value
+    values = pd.to_numeric(chunk["price_change_percentage_24h"], errors="coerce")
+    valid = values.notna().to_numpy()
+    return chunk.loc[valid, ["id", "timestamp"]], values[valid].to_numpy(np.float32)
+
+
+def detect_anomalies_streaming(snapshot_source, output_dir="data", start=None, contamination=0.01,
+                               chunk_rows=STREAM_CHUNK_ROWS, sample_rows=FIT_SAMPLE_ROWS):
+    """
+    Bounded-memory anomaly detection in two passes over the snapshot chunks.
+
+    Pass one keeps a uniform reservoir sample of the feature (at most
+    sample_rows values) and fits the Isolation Forest on it; pass two scores
+    each chunk and keeps only the flagged rows. Memory is set by chunk_rows
+    and sample_rows, not by how much history the source holds.
+    """
+    rng = np.random.default_rng(42)
+    sample = np.empty(sample_rows, dtype=np.float32)
+    seen = 0
+    for chunk in iter_snapshot_chunks(snapshot_source, FEATURE_SOURCE_COLUMNS, start, chunk_rows):
+        _, values = _chunk_features(chunk)
+        # Algorithm R, vectorised: value i replaces a random slot with probability sample_rows / (i + 1)
+        fill = min(max(sample_rows - seen, 0), len(values))
+        sample[seen:seen + fill] = values[:fill]
+        if fill < len(values):
+            slots = rng.integers(0, np.arange(seen + fill, seen + len(values)) + 1)
+            replace = slots < sample_rows
+            sample[slots[replace]] = values[fill:][replace]
+        seen += len(values)
+
+    if seen < 2: # Isolation Forest needs at least 2 samples
+        print("Anomaly detection skipped due to no valid features.")
+        return None, pd.DataFrame()
+    contamination = max(0.001, min(0.499, contamination))
+    model = IsolationForest(contamination=contamination, random_state=42)
+    model.fit(sample[:min(seen, sample_rows)].reshape(-1, 1))
+
+    flagged = []
+    for chunk in iter_snapshot_chunks(snapshot_source, FEATURE_SOURCE_COLUMNS, start, chunk_rows):
+        keys, values = _chunk_features(chunk)
+        if len(values) == 0:
+            continue
+        is_anomaly = model.predict(values.reshape(-1, 1)) == -1
+        flagged.append(keys[is_anomaly].assign(pct_change_24h=values[is_anomaly], anomaly_score=-1))
+    print(f"Scored {seen} snapshot rows in chunks of {chunk_rows}.")
+
+    anomalies = pd.concat(flagged, ignore_index=True) if flagged else pd.DataFrame(columns=ANOMALY_COLUMNS)
+    anomalies["id"] = anomalies["id"].astype(str)
+    anomalies = apply_schema(attach_metadata(anomalies), epoch_timestamps=False)
+    return save_anomalies(anomalies[ANOMALY_COLUMNS], output_dir)
+
+
+def detect_anomalies(snapshot_source, output_dir="data", lookback_hours=None, streaming=False):
+    """
+    End-to-end anomaly detection workflow.
+
+    Args:
+        snapshot_source (str): Snapshot store directory or legacy snapshot CSV.
+        output_dir (str): Where the anomalies CSV is written.
+        lookback_hours (float, optional): Only score snapshots from the last N hours.
+        streaming (bool): Process the snapshot in bounded-memory chunks
+                          (see detect_anomalies_streaming) instead of loading it whole.
+    """
+    print(f"Starting anomaly detection from {snapshot_source}")
+    start = None
+    if lookback_hours is not None:
+        start = pd.Timestamp.utcnow() - pd.Timedelta(hours=lookback_hours)
+    if streaming:
+        return detect_anomalies_streaming(snapshot_source, output_dir, start=start)
+    df = load_market_snapshot(snapshot_source, columns=FEATURE_SOURCE_COLUMNS, start=start)
     if df.empty:
          print("Anomaly detection skipped due to no data.")
          return None, pd.DataFrame()
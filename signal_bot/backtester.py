@@ -3,24 +3,48 @@ import pandas as pd
 import os
 import numpy as np # Import numpy for isna
 
-def backtest_signals(signal_csv, price_csv, threshold=0.05, window=6):
+def _backtest_result(signal, price_at_signal, max_price, threshold):
+    return_pct = (max_price - price_at_signal) / price_at_signal
+    return {
+        "id": signal["id"],
+        "timestamp": signal["timestamp"],
+        "signal": signal["signal"],
+        "price_at_signal": price_at_signal,
+        "max_future_price": max_price,
+        "return_pct": return_pct,
+        "success": return_pct >= threshold
+    }
+
+def _load_frame(df_or_path):
+    if isinstance(df_or_path, pd.DataFrame):
+        return df_or_path.copy()
+    return pd.read_csv(df_or_path, parse_dates=["timestamp"])
+
+def _describe(df_or_path):
+    return "the provided DataFrame" if isinstance(df_or_path, pd.DataFrame) else df_or_path
+
+def backtest_signals(signal_csv, price_csv, threshold=0.05, window=6, store=None):
     """
     Backtests trading signals against historical price data.
 
     Args:
-        signal_csv (str): Path to the CSV file containing signals.
-        price_csv (str): Path to the CSV file containing historical price data.
+        signal_csv (str or pd.DataFrame): Signals, or a path to a CSV file containing them.
+        price_csv (str or pd.DataFrame): Historical prices, or a path to a CSV file containing them.
+                                         Not used when a store is given.
         threshold (float): The percentage price increase considered a successful BUY signal.
         window (int): The number of future price points (rows) to consider after a signal.
+        store (SQLiteStore, optional): Look prices up in the indexed 'prices' table
+                                       and save results to 'backtest_results'.
 
     Returns:
         pd.DataFrame: DataFrame containing backtest results.
     """
     print("\\n--- Inside backtest_signals ---")
     try:
-        signals = pd.read_csv(signal_csv, parse_dates=["timestamp"])
-        prices = pd.read_csv(price_csv, parse_dates=["timestamp"])
-        print(f"Successfully loaded {signal_csv} and {price_csv} for backtesting.")
+        # Frames handed over in-process are used as they are, paths are parsed
+        signals = _load_frame(signal_csv)
+        prices = _load_frame(price_csv) if store is None else None
+        print(f"Successfully loaded {_describe(signal_csv)} and {_describe(price_csv) if store is None else 'the price store'} for backtesting.")
 
     except FileNotFoundError as e:
         print(f"Error loading data for backtesting: {e}")
@@ -35,7 +59,8 @@ def backtest_signals(signal_csv, price_csv, threshold=0.05, window=6):
     results = []
     # Ensure data is sorted for correct future price lookup
     signals = signals.sort_values("timestamp")
-    prices = prices.sort_values("timestamp")
+    if prices is not None:
+        prices = prices.sort_values("timestamp")
 
     # Filter for BUY signals using a more explicit method
     if 'signal' not in signals.columns:
@@ -58,7 +83,7 @@ def backtest_signals(signal_csv, price_csv, threshold=0.05, window=6):
         return pd.DataFrame()
 
     # Ensure prices DataFrame has necessary columns
-    if "id" not in prices.columns or "timestamp" not in prices.columns or "current_price" not in prices.columns:
+    if prices is not None and not {"id", "timestamp", "current_price"} <= set(prices.columns):
          print("Error: Required columns ('id', 'timestamp', 'current_price') missing in prices DataFrame for lookup.")
          print("--- Exiting backtest_signals ---\\n")
          return pd.DataFrame()
@@ -70,6 +95,14 @@ def backtest_signals(signal_csv, price_csv, threshold=0.05, window=6):
         coin_id = signal["id"]
         signal_time = signal["timestamp"]
 
+        if store is not None:
+            # Two index seeks on (id, timestamp) instead of filtering the whole price frame
+            found = store.price_at(coin_id, signal_time)
+            future = store.prices_after(coin_id, found[0], window) if found else []
+            if future:
+                results.append(_backtest_result(signal, found[1], max(future), threshold))
+            continue
+
         # Get the price at the signal time from the prices DataFrame
         price_at_signal_row = prices[
             (prices["id"] == coin_id) &
@@ -96,8 +129,7 @@ def backtest_signals(signal_csv, price_csv, threshold=0.05, window=6):
 
         # Filter for future prices of this coin within the window (next 'window' data points)
         # Find the index of the current signal in the sorted prices DataFrame for this coin
-        price_indices_for_coin = prices[prices["id"] == coin_id].sort_values("timestamp").index
-        signal_price_index_loc = price_indices_for_coin[price_indices_for_coin >= price_at_signal_row.index[0] if not price_at_signal_row.empty else price_indices_for_coin[price_indices_for_coin <= closest_price_row.index[0]].max()] # Find index of exact or closest price
+        signal_price_index_loc = price_at_signal_row.index[0] if not price_at_signal_row.empty else closest_price_row.index[0] # Index of exact or closest price
 
         if pd.isna(signal_price_index_loc): # Handle case where closest price lookup failed
              # print(f"Warning: Could not find price index for signal at {signal_time}. Skipping.") # Debug print
@@ -120,18 +152,7 @@ def backtest_signals(signal_csv, price_csv, threshold=0.05, window=6):
                  print("Error: 'current_price' column not found in future prices DataFrame subset.")
                  continue
             max_price = future_prices["current_price"].max()
-            return_pct = (max_price - price_at_signal) / price_at_signal
-
-            result = {
-                "id": coin_id,
-                "timestamp": signal_time,
-                "signal": signal["signal"],
-                "price_at_signal": price_at_signal,
-                "max_future_price": max_price,
-                "return_pct": return_pct,
-                "success": return_pct >= threshold
-            }
-            results.append(result)
+            results.append(_backtest_result(signal, price_at_signal, max_price, threshold))
         # else: # No future prices found within the window (handled by continue in try block)
              # print(f"Warning: No future price data found within window for {coin_id} at {signal_time}. Skipping backtest for this signal.") # Debug print
 
@@ -150,6 +171,8 @@ def backtest_signals(signal_csv, price_csv, threshold=0.05, window=6):
         print(f"Backtest results saved to {output_path}")
     except Exception as e:
         print(f"Error saving backtest results to {output_path}: {e}")
+    if store is not None:
+        store.write("backtest_results", result_df)
 
     print("--- Exiting backtest_signals ---\\n")
     return result_df
@@ -0,0 +1,93 @@
+# candle_store.py
+import os
+import pandas as pd
+from .utils.coingecko_api import iter_coin_ohlc, MAX_WORKERS
+from .utils.market_chart import OHLC_COLUMNS
+from .utils.npz_series import load_series, merge_series
+from .indicators.ta_utils import compute_indicators
+from .logger import log_info, log_error
+
+DATA_DIR = 'signal_bot/data'
+CANDLE_DIR = os.path.join(DATA_DIR, "candles")
+CANDLE_SYNC_COINS = 10 # Top-ranked coins whose candles the scheduler keeps, one /ohlc call each per sync
+
+
+def candle_path(coin_id, store_dir=CANDLE_DIR):
+    """Path of a coin's candle store file."""
+    return os.path.join(store_dir, f"{coin_id}.npz")
+
+
+def save_candles(coin_id, candles, store_dir=CANDLE_DIR):
+    """
+    Merges OHLC candles into a coin's store file, deduped by candle timestamp.
+
+    Args:
+        coin_id (str): CoinGecko coin id.
+        candles (dict): Output of get_coin_ohlc(..., as_arrays=True).
+        store_dir (str): Directory with one {coin_id}.npz file per coin.
+
+    Returns:
+        int: Number of candles stored for the coin after the merge.
+    """
+    if len(candles["timestamp"]) == 0:
+        return 0
+    return merge_series(candle_path(coin_id, store_dir), candles)
+
+
+def sync_candles(coin_ids, days="30", store_dir=CANDLE_DIR, max_workers=MAX_WORKERS):
+    """
+    Fetches OHLC candles for many coins concurrently and stores each one as soon as it arrives.
+
+    Returns:
+        dict: {coin_id: candles stored, or None if the fetch failed}.
+    """
+    results = {}
+    for coin_id, candles in iter_coin_ohlc(coin_ids, days=days, max_workers=max_workers, as_arrays=True):
+        if candles is None:
+            results[coin_id] = None
+            continue
+        try:
+            results[coin_id] = save_candles(coin_id, candles, store_dir)
+        except Exception as e:
+            log_error(f"Error storing candles for {coin_id}: {e}")
+            results[coin_id] = None
+    log_info(f"Candles synced for {sum(v is not None for v in results.values())}/{len(results)} coins.")
+    return results
+
+
+def load_candles(coin_id, store_dir=CANDLE_DIR):
+    """
+    Loads a coin's candles in the shape compute_indicators consumes directly.
+
+    Returns:
+        pd.DataFrame: Columns id, timestamp, open, high, low, close, current_price
+                      (current_price mirrors close). Empty if the coin has no candles.
+    """
+    columns = ["id", "timestamp", *OHLC_COLUMNS, "current_price"]
+    candles = load_series(candle_path(coin_id, store_dir))
+    if candles is None:
+        return pd.DataFrame(columns=columns)
+    df = pd.DataFrame({column: candles[column] for column in OHLC_COLUMNS})
+    df.insert(0, "timestamp", pd.to_datetime(candles["timestamp"], unit="ms"))
+    df.insert(0, "id", coin_id)
+    df["current_price"] = df["close"]
+    return df[columns]
+
+
+def latest_atr(coin_ids, store_dir=CANDLE_DIR):
+    """
+    Returns the newest candle-based Average True Range per coin, for joining
+    onto close-only snapshot indicators, which cannot compute a true range.
+
+    Returns:
+        pd.DataFrame: Columns id, atr; coins without candles (or too few for ATR) are left out.
+    """
+    rows = []
+    for coin_id in coin_ids:
+        candles = load_candles(coin_id, store_dir)
+        if candles.empty:
+            continue
+        atr = compute_indicators(candles).get("atr")
+        if atr is not None and atr.notna().any():
+            rows.append({"id": coin_id, "atr": float(atr.dropna().iloc[-1])})
+    return pd.DataFrame(rows, columns=["id", "atr"])
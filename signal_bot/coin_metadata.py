@@ -0,0 +1,185 @@
+# coin_metadata.py
+import ast
+import hashlib
+import json
+import os
+import pandas as pd
+from .utils.coingecko_api import get_coins_list
+from .utils.atomic_write import write_atomic, write_json_atomic
+from .logger import log_info, log_error
+
+DATA_DIR = 'signal_bot/data'
+COIN_LIST_PATH = os.path.join(DATA_DIR, "coin_list.csv")
+COIN_LIST_STATE_PATH = os.path.join(DATA_DIR, "coin_list_state.json")
+COIN_DIM_PATH = os.path.join(DATA_DIR, "coin_dim.csv")
+
+# Per-coin fields that rarely change; kept once in the dimension instead of on every snapshot row
+STATIC_COLUMNS = ["symbol", "name", "image", "ath", "ath_date", "atl", "atl_date", "max_supply", "roi"]
+NUMERIC_STATIC_COLUMNS = ["ath", "atl", "max_supply"]
+DATE_STATIC_COLUMNS = ["ath_date", "atl_date"]
+# Fields that move between snapshots; snapshot rows keep only these plus the coin key
+VOLATILE_COLUMNS = [
+    "current_price", "market_cap", "market_cap_rank", "fully_diluted_valuation", "total_volume",
+    "high_24h", "low_24h", "price_change_24h", "price_change_percentage_24h",
+    "market_cap_change_24h", "market_cap_change_percentage_24h", "circulating_supply",
+    "total_supply", "ath_change_percentage", "atl_change_percentage", "last_updated",
+]
+
+
+def _hash_records(records):
+    canonical = json.dumps(records, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _normalize_roi(roi):
+    # API rows carry a dict, the dimension stores JSON text, legacy snapshot CSVs hold the dict's Python repr
+    if isinstance(roi, str):
+        try:
+            roi = json.loads(roi)
+        except ValueError:
+            try:
+                roi = ast.literal_eval(roi)
+            except (ValueError, SyntaxError):
+                return roi
+    return json.dumps(roi, sort_keys=True) if isinstance(roi, dict) else None
+
+
+def _normalize_static(df):
+    """
+    Returns the static columns of df as canonical typed values: floats for
+    prices and supply, ISO-8601 UTC text for dates (from text or epoch ms),
+    JSON text for roi, str for the rest, None for anything missing.
+    """
+    out = {}
+    for col in [col for col in STATIC_COLUMNS if col in df.columns]:
+        values = df[col]
+        if col in NUMERIC_STATIC_COLUMNS:
+            values = pd.to_numeric(values, errors="coerce").astype(float)
+        elif col in DATE_STATIC_COLUMNS:
+            if pd.api.types.is_numeric_dtype(values):
+                values = pd.to_datetime(values, unit="ms", utc=True, errors="coerce") # Cleaned rows hold epoch ms
+            else:
+                values = pd.to_datetime(values, utc=True, errors="coerce", format="ISO8601")
+            values = values.dt.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+        elif col == "roi":
+            values = values.map(_normalize_roi)
+        else:
+            values = values.map(lambda value: None if pd.isna(value) else str(value))
+        out[col] = values.astype(object).where(values.notna(), None)
+    return pd.DataFrame(out, index=df.index)
+
+
+def _static_hashes(static):
+    # Floats are compared at float32 precision, the narrowest type the pipeline keeps them in,
+    # so API rows and the same rows parsed back from a raw or cleaned CSV hash identically
+    static = static.copy()
+    for col in [col for col in NUMERIC_STATIC_COLUMNS if col in static.columns]:
+        static[col] = static[col].map(lambda value: None if value is None else f"{value:.7g}")
+    return [_hash_records(record) for record in static.to_dict("records")]
+
+
+def load_listed_ids(path=COIN_LIST_PATH):
+    """Returns the set of coin ids in the cached /coins/list, or None if it was never refreshed."""
+    if not os.path.exists(path):
+        return None
+    return set(pd.read_csv(path, usecols=["id"], dtype=str)["id"])
+
+
+def refresh_coin_list(force=False):
+    """
+    Refreshes coin_list.csv from /coins/list, rewriting it only when the universe changed.
+    load_universe drops coins that are no longer listed, so delisted coins stop
+    costing tick, history and candle calls.
+
+    Args:
+        force (bool): Rewrite the list even if its hash is unchanged.
+
+    Returns:
+        bool or None: True if the list changed, False if unchanged, None if the fetch failed.
+    """
+    coins = get_coins_list()
+    if coins is None:
+        log_error("Failed to fetch the CoinGecko coin list.")
+        return None
+
+    coins = sorted(coins, key=lambda coin: coin.get("id", ""))
+    digest = _hash_records(coins)
+    try:
+        with open(COIN_LIST_STATE_PATH) as f:
+            state = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        state = {}
+    if not force and state.get("hash") == digest and os.path.exists(COIN_LIST_PATH):
+        log_info(f"Coin list unchanged ({len(coins)} coins).")
+        return False
+
+    coin_list = pd.DataFrame(coins, columns=["id", "symbol", "name"])
+    write_atomic(COIN_LIST_PATH, lambda f: coin_list.to_csv(f, index=False))
+    # State last: a crash before it leaves the old hash, so the next refresh rewrites the list
+    write_json_atomic(COIN_LIST_STATE_PATH, {"hash": digest, "count": len(coins), "refreshed_at": pd.Timestamp.utcnow().isoformat()})
+    log_info(f"Coin list changed, {len(coins)} coins written to {COIN_LIST_PATH}.")
+    return True
+
+
+def load_coin_dimension(path=COIN_DIM_PATH):
+    """Returns the coin dimension (id, static fields, row_hash), empty if none was built yet."""
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=["id", *STATIC_COLUMNS, "row_hash"])
+    return pd.read_csv(path)
+
+
+def update_coin_dimension(df, path=COIN_DIM_PATH):
+    """
+    Upserts the static fields of a market snapshot into the coin dimension.
+
+    Each coin's static fields are hashed; the file is only rewritten when a
+    coin is new or one of its static fields changed (e.g. a new ATH).
+
+    Args:
+        df (pd.DataFrame): Market snapshot with an 'id' column and any of STATIC_COLUMNS.
+        path (str): Dimension CSV.
+
+    Returns:
+        int: Number of coins added or updated.
+    """
+    columns = [col for col in STATIC_COLUMNS if col in df.columns]
+    if "id" not in df.columns or not columns:
+        return 0
+
+    latest = df.drop_duplicates("id", keep="last")
+    # Hashes are taken over typed values, so a re-import of rows parsed back from CSV is not seen as a change
+    incoming = pd.concat([latest[["id"]].astype(str), _normalize_static(latest)], axis=1)
+    incoming["row_hash"] = _static_hashes(incoming[columns])
+
+    dim = load_coin_dimension(path)
+    known = dict(zip(dim["id"], dim["row_hash"]))
+    changed = incoming[[known.get(coin_id) != row_hash for coin_id, row_hash in zip(incoming["id"], incoming["row_hash"])]]
+    if changed.empty:
+        return 0
+
+    dim = pd.concat([dim[~dim["id"].isin(changed["id"])], changed], ignore_index=True)
+    write_atomic(path, lambda f: dim.to_csv(f, index=False))
+    log_info(f"Coin dimension updated for {len(changed)} coins.")
+    return len(changed)
+
+
+def snapshot_facts(df):
+    """Keeps only the coin key, timestamp and volatile numeric fields of a market snapshot."""
+    keep = ["id", "timestamp", *VOLATILE_COLUMNS]
+    return df[[col for col in keep if col in df.columns]]
+
+
+def attach_metadata(df, columns=("symbol", "name"), path=COIN_DIM_PATH):
+    """
+    Fills static fields from the coin dimension onto snapshot rows that lack them,
+    either because the column is absent (compact snapshots) or empty (rows
+    appended to an older wide-schema file).
+    """
+    if "id" not in df.columns:
+        return df
+    # An empty dimension still yields the columns (all NaN) so downstream selections hold
+    lookup = load_coin_dimension(path).set_index("id")
+    for col in columns:
+        values = df["id"].map(lookup[col])
+        df[col] = values if col not in df.columns else df[col].fillna(values)
+    return df
@@ -2,13 +2,46 @@
 import streamlit as st
 import pandas as pd
 import os
+import sqlite3
+import sys
+import time
+from contextlib import closing
+
+# `streamlit run signal_bot/dashboard.py` only puts signal_bot/ on the path; the package lives one level up
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from signal_bot.publisher import read_published
+from signal_bot.rollups import query_history
+from signal_bot.sparkline_store import SPARKLINE_DIR, load_sparkline_series
 
 # Define DATA_DIR
 DATA_DIR = 'signal_bot/data'
+SQLITE_PATH = os.path.join(DATA_DIR, "signal_bot.sqlite") # Written by the scheduler, see sqlite_store.py
+USE_SQLITE = os.environ.get("SIGNAL_BOT_SQLITE") == "1" and os.path.exists(SQLITE_PATH)
+SQLITE_LOOKBACK_HOURS = 24
+
+
+def load_published(name, fallback_path):
+    """
+    Reads the latest complete generation of a published dataset by following
+    its manifest; no locks, and a publish in progress is never visible.
+    Falls back to the fixed-name CSV for data written before publishing existed.
+    """
+    df = read_published(name)
+    return pd.read_csv(fallback_path) if df is None else df
+
+
+def load_recent(table, hours=SQLITE_LOOKBACK_HOURS):
+    """Reads the last hours of a table through a read-only connection; WAL keeps it from blocking the writer."""
+    since_ms = int((time.time() - hours * 3600) * 1000)
+    # closing() rather than the connection's own context manager, which only ends the transaction
+    with closing(sqlite3.connect(f"file:{SQLITE_PATH}?mode=ro", uri=True, timeout=30)) as conn:
+        df = pd.read_sql_query(f"SELECT * FROM {table} WHERE timestamp >= ? ORDER BY id, timestamp", conn, params=(since_ms,))
+    df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
+    return df
 
 st.title("Crypto Signal Dashboard")
 
-tab1, tab2, tab3 = st.tabs(["Signals", "Anomalies", "Indicators"])
+tab1, tab2, tab3, tab4 = st.tabs(["Signals", "Anomalies", "Indicators", "History"])
 
 # Ensure files exist before trying to read
 signals_path = os.path.join(DATA_DIR, "top10_signals.csv")
@@ -17,9 +50,9 @@ indicators_path = os.path.join(DATA_DIR, "top10_with_indicators.csv")
 
 with tab1:
     st.subheader("Signal Feed (Top 10)")
-    if os.path.exists(signals_path):
+    if USE_SQLITE or os.path.exists(signals_path):
         try:
-            signals = pd.read_csv(signals_path)
+            signals = load_recent("signals") if USE_SQLITE else load_published("top10_signals", signals_path)
             st.dataframe(signals)
         except Exception as e:
             st.error(f"Error loading signals data: {e}")
@@ -44,9 +77,9 @@ with tab2:
 
 with tab3:
     st.subheader("Top 10 Indicators")
-    if os.path.exists(indicators_path):
+    if USE_SQLITE or os.path.exists(indicators_path):
         try:
-            indicators = pd.read_csv(indicators_path)
+            indicators = load_recent("indicators") if USE_SQLITE else load_published("top10_with_indicators", indicators_path)
             chart_cols = ["rsi", "macd_diff"]
             available_chart_cols = [col for col in chart_cols if col in indicators.columns and pd.api.types.is_numeric_dtype(indicators[col])]
 
@@ -69,6 +102,42 @@ with tab3:
     else:
         st.info(f"Indicator data not found at {indicators_path}. Run the main pipeline first.")
 
+with tab4:
+    st.subheader("Close History")
+    # query_history picks the cheapest rollup tier for the range, e.g. one small file per year of daily bars
+    ranges = {"Last 7 days (1h)": (7, "1h"), "Last 90 days (1d)": (90, "1D"), "All (1d)": (None, "1D")}
+    days, resolution = ranges[st.selectbox("Range", list(ranges))]
+    start = None if days is None else pd.Timestamp.now(tz="UTC") - pd.Timedelta(days=days)
+    try:
+        history = query_history(start=start, resolution=resolution)
+        if history.empty:
+            st.info("No rollups found for this range. They are built by the scheduler's rollup job.")
+        else:
+            st.caption(f"Source: {history.attrs['tier']} bars")
+            coins = sorted(history["id"].unique())
+            selected = st.multiselect("Coins", coins, default=coins[:3])
+            if selected:
+                st.line_chart(history[history["id"].isin(selected)].pivot(index="timestamp", columns="id", values="close"))
+    except Exception as e:
+        st.error(f"Error loading history: {e}")
+
+    st.subheader("Last 7 Days, Hourly")
+    # Hourly series harvested from the sparkline_in_7d arrays of every full collection, no extra API calls
+    spark_coins = []
+    if os.path.isdir(SPARKLINE_DIR):
+        spark_coins = sorted(name[:-len(".npz")] for name in os.listdir(SPARKLINE_DIR) if name.endswith(".npz"))
+    if spark_coins:
+        try:
+            picked = st.multiselect("Coins", spark_coins, default=spark_coins[:3], key="sparkline_coins")
+            if picked:
+                hourly = pd.concat([load_sparkline_series(coin_id) for coin_id in picked], ignore_index=True)
+                hourly = hourly[hourly["timestamp"] >= hourly["timestamp"].max() - pd.Timedelta(days=7)]
+                st.line_chart(hourly.pivot(index="timestamp", columns="id", values="current_price"))
+        except Exception as e:
+            st.error(f"Error loading sparkline series: {e}")
+    else:
+        st.info(f"No sparkline series found in {SPARKLINE_DIR}. They are stored by every full data collection.")
+
 st.sidebar.subheader("How to run the dashboard:")
 st.sidebar.markdown("1. Ensure you have Streamlit installed (`pip install streamlit`).")
 st.sidebar.markdown("2. Run the main pipeline (`python -m signal_bot.main`) to generate data files.")
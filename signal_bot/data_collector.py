@@ -1,23 +1,28 @@
 data_collector_content = """# signal_bot/data_collector.py
 import pandas as pd
 import os
-from .utils.coingecko_api import get_top_coins
+import json
+from .utils.coingecko_api import get_top_coins, get_simple_prices
 from .dataset_manager import clean_and_normalize # Import clean_and_normalize
+from .sparkline_store import harvest_sparklines
+from .coin_metadata import update_coin_dimension, snapshot_facts, load_listed_ids
+from .snapshot_store import append_snapshot, SNAPSHOT_STORE_DIR, PRICE_TICKS_DIR, TICK_SCHEMA
+from .utils.atomic_write import write_atomic
 from .logger import setup_logger, log_info, log_error # Import logger
 
 DATA_DIR = 'signal_bot/data'
 os.makedirs(DATA_DIR, exist_ok=True)
+UNIVERSE_PATH = os.path.join(DATA_DIR, "coin_universe.json") # Coin ids of the last full snapshot, in rank order
 
 def collect_data(limit=250):
     """
     Fetches a snapshot of market data for a specified number of top coins
-    and saves it to full_market_snapshot.csv.
+    and appends it to the date-partitioned Parquet snapshot store.
 
     Args:
-        limit (int): The number of top coins to fetch data for. Note CoinGecko
-                     /coins/markets has a per_page limit (typically 250).
-                     Fetching more than the limit might require pagination.
-                     Current implementation fetches up to 'limit' on page 1.
+        limit (int): The number of top coins to fetch data for. Limits above
+                     CoinGecko's per_page cap (250) are fetched as parallel
+                     pages and merged in market_cap_rank order.
 
     Returns:
         pd.DataFrame or None: DataFrame with market data if successful, None otherwise.
@@ -28,25 +33,33 @@ def collect_data(limit=250):
     try:
         data = get_top_coins(limit=limit)
         if data is not None:
+            # The sparkline_in_7d arrays already carry 168 hourly prices per coin, keep them per coin
+            harvest_sparklines(data)
+
+            # Remember the universe so the lightweight price poller knows which ids to ask for;
+            # replaced atomically because the tick job reads it from another scheduler thread
+            universe = json.dumps([coin["id"] for coin in data]).encode("utf-8")
+            write_atomic(UNIVERSE_PATH, lambda f: f.write(universe))
+
             df = pd.DataFrame(data)
 
             # Add current timestamp to each row
             df["timestamp"] = pd.Timestamp.utcnow()
 
-            # Clean and normalize the collected data
+            # Static fields (name, symbol, image, ath_date, roi, ...) live once in the coin dimension,
+            # taken before cleaning drops nested columns such as roi
+            update_coin_dimension(df)
+
+            # Clean and normalize the collected data into the compact declared schema
             df = clean_and_normalize(df)
             log_info("Data collected and cleaned.")
 
-            # Ensure output directory exists (already done by DATA_DIR os.makedirs)
-            full_snapshot_path = os.path.join(DATA_DIR, "full_market_snapshot.csv")
+            # Snapshot rows keep only the coin key and volatile numeric fields
+            df = snapshot_facts(df)
 
-            # Append data to existing file or create new
-            if os.path.exists(full_snapshot_path):
-                 df.to_csv(full_snapshot_path, mode='a', header=False, index=False)
-                 log_info(f"Market snapshot appended to {full_snapshot_path}.")
-            else:
-                 df.to_csv(full_snapshot_path, index=False)
-                 log_info(f"New market snapshot created at {full_snapshot_path}.")
+            # Each collection becomes a new part file in its date partition, history is never rewritten
+            append_snapshot(df)
+            log_info(f"Market snapshot appended to {SNAPSHOT_STORE_DIR}.")
 
             return df
         else:
@@ -56,6 +69,67 @@ def collect_data(limit=250):
         log_error(f"Error during full market data collection: {e}")
         return None
 
+def load_universe():
+    """
+    Returns the coin ids of the last full snapshot in rank order, less any coin
+    no longer in the cached /coins/list, or an empty list if none was collected yet.
+    """
+    try:
+        with open(UNIVERSE_PATH) as f:
+            coin_ids = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return []
+    listed = load_listed_ids()
+    return coin_ids if listed is None else [coin_id for coin_id in coin_ids if coin_id in listed]
+
+
+def collect_price_ticks(coin_ids=None):
+    """
+    Cheap high-frequency refresh: fetches price, 24h change and 24h volume via
+    batched /simple/price calls and appends them to the date-partitioned tick
+    store (PRICE_TICKS_DIR), which is compacted and aged out like the snapshots.
+
+    Args:
+        coin_ids (list, optional): Coins to poll. Defaults to the universe of the last full snapshot.
+
+    Returns:
+        pd.DataFrame or None: The appended ticks if successful, None otherwise.
+    """
+    coin_ids = coin_ids if coin_ids is not None else load_universe()
+    if not coin_ids:
+        log_info("No coin universe available yet for price polling. Run collect_data first.")
+        return None
+
+    try:
+        prices = get_simple_prices(coin_ids)
+        if prices is None:
+            log_error("Failed to fetch simple prices for price ticks.")
+            return None
+
+        # Column names follow /coins/markets so ticks line up with the full snapshot
+        df = pd.DataFrame([
+            {
+                "id": coin_id,
+                "current_price": quote.get("usd"),
+                "price_change_percentage_24h": quote.get("usd_24h_change"),
+                "total_volume": quote.get("usd_24h_vol"),
+                "last_updated": pd.to_datetime(quote.get("last_updated_at"), unit="s", utc=True),
+            }
+            for coin_id, quote in prices.items()
+        ])
+        if df.empty:
+            log_info("Simple price poll returned no quotes.")
+            return df
+        df["timestamp"] = pd.Timestamp.utcnow()
+        df = clean_and_normalize(df)
+
+        append_snapshot(df, PRICE_TICKS_DIR, TICK_SCHEMA)
+        log_info(f"Appended {len(df)} price ticks to {PRICE_TICKS_DIR}.")
+        return df
+    except Exception as e:
+        log_error(f"Error during price tick collection: {e}")
+        return None
+
 # Example of how to run the data collector as a script
 if __name__ == '__main__':
     # setup_logger() # Setup logger if running this script directly
@@ -1,11 +1,98 @@
 dataset_manager_content = """# dataset_manager.py
 import pandas as pd
 
-def clean_and_normalize(df):
-    """Clean and normalize DataFrame columns and data types."""
+# Declared dtypes for market frames (/coins/markets rows, price ticks). Prices and
+# percentages fit float32's ~7 significant digits; caps, volumes and supplies run
+# into the trillions and stay float64. Columns not listed keep their inferred type.
+SNAPSHOT_SCHEMA = {
+    "id": "category",
+    "symbol": "category",
+    "name": "category",
+    "timestamp": "epoch_ms",
+    "last_updated": "epoch_ms",
+    "ath_date": "epoch_ms",
+    "atl_date": "epoch_ms",
+    "current_price": "float32",
+    "high_24h": "float32",
+    "low_24h": "float32",
+    "price_change_24h": "float32",
+    "price_change_percentage_24h": "float32",
+    "market_cap_change_percentage_24h": "float32",
+    "ath": "float32",
+    "ath_change_percentage": "float32",
+    "atl": "float32",
+    "atl_change_percentage": "float32",
+    "market_cap_rank": "float32", # Nullable for unranked coins, so not an integer type
+    "market_cap": "float64",
+    "fully_diluted_valuation": "float64",
+    "total_volume": "float64",
+    "market_cap_change_24h": "float64",
+    "circulating_supply": "float64",
+    "total_supply": "float64",
+    "max_supply": "float64",
+}
+
+
+EPOCH = pd.Timestamp(0, tz="UTC")
+
+
+def memory_usage_mb(df):
+    """Deep memory footprint of a DataFrame in MB (object strings included)."""
+    return df.memory_usage(deep=True).sum() / 1024 ** 2
+
+
+def _is_nested(series):
+    # dict/list cells such as roi or sparkline_in_7d
+    sample = series.dropna().head(20)
+    return series.dtype == object and any(isinstance(value, (dict, list)) for value in sample)
+
+
+def apply_schema(df, schema=SNAPSHOT_SCHEMA, epoch_timestamps=True):
+    """
+    Casts a frame to the declared schema and drops nested columns.
+
+    Args:
+        df (pd.DataFrame): Frame to convert.
+        schema (dict): {column: "category" | "epoch_ms" | numpy dtype name}.
+        epoch_timestamps (bool): Store "epoch_ms" columns as nullable Int64
+                                 milliseconds; False keeps them as UTC datetimes
+                                 for display-bound frames.
+
+    Returns:
+        pd.DataFrame: The converted frame.
+    """
+    df = df.drop(columns=[col for col in df.columns if _is_nested(df[col])])
+    for col, kind in schema.items():
+        if col not in df.columns:
+            continue
+        if kind == "category":
+            df[col] = df[col].astype("category")
+        elif kind == "epoch_ms":
+            values = df[col]
+            if pd.api.types.is_integer_dtype(values):
+                continue # Already epoch ms
+            values = pd.to_datetime(values, utc=True, errors="coerce")
+            if epoch_timestamps:
+                # Millisecond epochs are exact in float64, the detour just carries NaT through as <NA>
+                values = ((values - EPOCH) / pd.Timedelta(milliseconds=1)).round().astype("Int64")
+            df[col] = values
+        else:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype(kind)
+    return df
+
+
+def clean_and_normalize(df, schema=SNAPSHOT_SCHEMA):
+    """
+    Clean and normalize DataFrame columns and data types.
+
+    Columns are cast to the declared schema (see apply_schema): categorical
+    ids, symbols and names, float32 prices, Int64 epoch-ms timestamps, and no
+    nested columns.
+    """
     if df.empty:
         print("Warning: Input DataFrame is empty for cleaning and normalization.")
         return df
+    memory_before = memory_usage_mb(df)
 
     # Convert column names to lowercase and replace spaces with underscores
     df.columns = [col.lower().replace(" ", "_") for col in df.columns]
@@ -17,13 +104,10 @@ def clean_and_normalize(df):
     else:
          df = df.dropna(subset=required_subset_cols)
 
-    # Convert timestamp column to datetime, coerce errors to NaT
-    if "timestamp" in df.columns:
-        df["timestamp"] = pd.to_datetime(df["timestamp"], errors='coerce')
-        # Optionally drop rows where timestamp conversion failed
-        # df = df.dropna(subset=["timestamp"])
-    else:
+    # Timestamps become Int64 epoch ms (unparseable values become <NA>)
+    if "timestamp" not in df.columns:
          print("Warning: 'timestamp' column not found for datetime conversion.")
+    df = apply_schema(df, schema)
 
 
     # Sort by id and timestamp
@@ -36,7 +120,7 @@ def clean_and_normalize(df):
     else:
         print("Warning: 'id' and 'timestamp' columns not found for sorting.")
 
-
+    print(f"clean_and_normalize: {memory_usage_mb(df):.2f} MB (was {memory_before:.2f} MB) for {len(df)} rows.")
     return df
 """
 with open('signal_bot/dataset_manager.py', 'w') as f:
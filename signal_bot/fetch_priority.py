@@ -0,0 +1,158 @@
+# fetch_priority.py
+import heapq
+import json
+import os
+import time
+import pandas as pd
+from .publisher import read_published
+from .utils.atomic_write import write_json_atomic
+from .snapshot_store import TICK_SCHEMA, read_snapshots
+from .logger import log_info, log_error
+
+DATA_DIR = 'signal_bot/data'
+REFRESH_STATE_PATH = os.path.join(DATA_DIR, "priority_refresh_state.json")
+
+# Score weights: each non-HOLD signal, an anomaly flag, and every 5% of 24h move add to a coin's heat
+SIGNAL_WEIGHT = 2.0
+ANOMALY_WEIGHT = 3.0
+PRICE_CHANGE_SCALE = 5.0
+
+MIN_REFRESH_SECONDS = 10 * 60 # Hottest coins refresh every pipeline cycle
+MAX_REFRESH_SECONDS = 6 * 60 * 60 # Quiet coins still refresh a few times a day
+CALLS_PER_CYCLE = 25 # History calls one refresh cycle may spend
+
+
+def score_coins(coin_ids, signals=None, anomalies=None, market=None):
+    """
+    Ranks coins by how much is happening to them.
+
+    Args:
+        coin_ids (list): Universe to score.
+        signals (pd.DataFrame, optional): find_signals output with 'id' and 'signal' columns.
+        anomalies (pd.DataFrame, optional): Rows flagged by the anomaly detector ('id' column).
+        market (pd.DataFrame, optional): Latest quotes with 'id' and 'price_change_percentage_24h'.
+
+    Returns:
+        dict: {coin_id: score >= 0}, higher means refresh more often.
+    """
+    scores = dict.fromkeys(coin_ids, 0.0)
+
+    if signals is not None and not signals.empty and {"id", "signal"} <= set(signals.columns):
+        active = signals[signals["signal"].astype(str) != "HOLD"]
+        for coin_id, count in active.groupby("id").size().items():
+            if coin_id in scores:
+                scores[coin_id] += SIGNAL_WEIGHT * count
+
+    if anomalies is not None and not anomalies.empty and "id" in anomalies.columns:
+        for coin_id in anomalies["id"].unique():
+            if coin_id in scores:
+                scores[coin_id] += ANOMALY_WEIGHT
+
+    if market is not None and not market.empty and {"id", "price_change_percentage_24h"} <= set(market.columns):
+        change = pd.to_numeric(market["price_change_percentage_24h"], errors="coerce").abs()
+        latest = change.groupby(market["id"]).last().dropna()
+        for coin_id, move in latest.items():
+            if coin_id in scores:
+                scores[coin_id] += move / PRICE_CHANGE_SCALE
+
+    return scores
+
+
+def load_activity(data_dir=DATA_DIR):
+    """
+    Loads the latest signals, anomalies and 24h price moves written by the pipeline.
+
+    Returns:
+        tuple: (signals, anomalies, market) DataFrames, each None when not available.
+    """
+    signals = anomalies = market = None
+    try:
+        signals = read_published("top10_signals", os.path.join(data_dir, "published"), usecols=["id", "signal"])
+
+        anomaly_files = sorted(f for f in os.listdir(data_dir) if f.startswith("anomalies_") and f.endswith(".csv"))
+        if anomaly_files:
+            anomalies = pd.read_csv(os.path.join(data_dir, anomaly_files[-1]), usecols=["id"])
+
+        # Only the last hour of tick partitions is opened; the latest quote per coin is what counts
+        market = read_snapshots(
+            os.path.join(data_dir, "price_ticks"), columns=["id", "timestamp", "price_change_percentage_24h"],
+            start=pd.Timestamp.now(tz="UTC") - pd.Timedelta(hours=1), schema=TICK_SCHEMA,
+        )
+        market = market.assign(id=market["id"].astype(str)).sort_values("timestamp")
+    except Exception as e:
+        log_error(f"Error loading activity for fetch priority: {e}")
+    return signals, anomalies, market
+
+
+class PriorityFetchQueue:
+    """
+    Decides which coins to refresh next within a fixed per-cycle call budget.
+
+    Each coin's target refresh interval shrinks with its activity score, from
+    max_refresh for quiet coins down to min_refresh for hot ones. A cycle
+    refreshes the coins that are most overdue relative to their own interval,
+    up to budget calls; coins that are not yet due are left alone.
+
+    Args:
+        budget (int): Maximum coins (API calls) per cycle.
+        min_refresh (float): Interval in seconds for the hottest coins.
+        max_refresh (float): Interval in seconds for quiet coins.
+        state_path (str): JSON file keeping last refresh times across restarts.
+    """
+
+    def __init__(self, budget=CALLS_PER_CYCLE, min_refresh=MIN_REFRESH_SECONDS,
+                 max_refresh=MAX_REFRESH_SECONDS, state_path=REFRESH_STATE_PATH):
+        self.budget = budget
+        self.min_refresh = min_refresh
+        self.max_refresh = max_refresh
+        self.state_path = state_path
+        self.scores = {}
+        try:
+            with open(state_path) as f:
+                self.last_refreshed = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.last_refreshed = {}
+
+    def update_scores(self, scores):
+        self.scores = dict(scores)
+
+    def refresh_interval(self, coin_id):
+        interval = self.max_refresh / (1.0 + self.scores.get(coin_id, 0.0))
+        return max(self.min_refresh, min(self.max_refresh, interval))
+
+    def next_batch(self, now=None):
+        """
+        Returns up to budget coin ids that are due, most overdue (relative to their interval) first.
+        Ties (e.g. every coin on a cold start) go to the hotter coin, then to the higher-ranked one,
+        rank being the coin's position in the universe passed to score_coins.
+        """
+        now = time.time() if now is None else now
+        due = []
+        for rank, coin_id in enumerate(self.scores):
+            last = self.last_refreshed.get(coin_id)
+            # Never-refreshed coins go first, hotter ones ahead of quieter ones
+            urgency = float("inf") if last is None else (now - last) / self.refresh_interval(coin_id)
+            if urgency >= 1.0:
+                due.append((urgency, self.scores[coin_id], -rank, coin_id))
+        return [coin_id for _, _, _, coin_id in heapq.nlargest(self.budget, due)]
+
+    def mark_refreshed(self, coin_ids, now=None):
+        now = time.time() if now is None else now
+        for coin_id in coin_ids:
+            self.last_refreshed[coin_id] = now
+        write_json_atomic(self.state_path, self.last_refreshed)
+
+
+def plan_refresh(coin_ids, data_dir=DATA_DIR, queue=None):
+    """
+    Scores the universe from the latest pipeline output and returns the queue and this cycle's batch.
+
+    Returns:
+        tuple: (PriorityFetchQueue, list of coin ids to refresh now).
+    """
+    queue = queue or PriorityFetchQueue()
+    queue.update_scores(score_coins(coin_ids, *load_activity(data_dir)))
+    batch = queue.next_batch()
+    hot = sum(1 for coin_id in batch if queue.scores.get(coin_id, 0) > 0)
+    log_info(f"Priority refresh: {len(batch)}/{len(coin_ids)} coins due ({hot} with recent activity).")
+    return queue, batch
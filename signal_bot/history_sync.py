@@ -0,0 +1,194 @@
+# history_sync.py
+import functools
+import json
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+from .utils.coingecko_api import get_coin_history_range, iter_concurrent, MAX_WORKERS
+from .timeseries_store import TimeSeriesStore
+from .utils.file_lock import file_lock
+from .utils.atomic_write import write_atomic, write_json_atomic
+from .sqlite_store import default_store
+from .logger import log_info, log_error
+
+DATA_DIR = 'signal_bot/data'
+SYNC_STATE_PATH = os.path.join(DATA_DIR, "history_sync_state.json")
+INITIAL_DAYS = 30 # Backfill window for coins that have never been synced
+MIN_INTERVAL_MS = 60 * 60 * 1000 # Keep the appended series on the hourly grid of the 30-day backfill
+HISTORY_COLUMNS = ["timestamp", "current_price", "market_cap", "total_volume"]
+
+_state_lock = threading.Lock()
+timeseries = TimeSeriesStore() # Memory-mapped copy of every synced history, see timeseries_store.py
+
+
+def history_path(coin_id, data_dir=DATA_DIR):
+    """Path of the per-coin historical price CSV that main.py reads."""
+    return os.path.join(data_dir, f"{coin_id}_historical_price.csv")
+
+
+def _sync_lock_path(coin_id, data_dir=DATA_DIR):
+    # Kept out of the data directory itself, which would otherwise gain one lock file per coin
+    return os.path.join(data_dir, "locks", f"{coin_id}_history.lock")
+
+
+def load_sync_state(state_path=SYNC_STATE_PATH):
+    """Returns the {coin_id: last ingested timestamp in ms} high-water marks."""
+    try:
+        with open(state_path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except json.JSONDecodeError as e:
+        log_error(f"Corrupt history sync state at {state_path}: {e}. Starting from scratch.")
+        return {}
+
+
+def _set_high_water_mark(coin_id, timestamp_ms, state_path=SYNC_STATE_PATH):
+    # Read-modify-write under the thread and cross-process locks (the state file holds every coin), then swap it in atomically
+    state_lock_path = os.path.join(os.path.dirname(state_path) or '.', "locks", f"{os.path.basename(state_path)}.lock")
+    with _state_lock, file_lock(state_lock_path):
+        state = load_sync_state(state_path)
+        state[coin_id] = int(timestamp_ms)
+        write_json_atomic(state_path, state)
+
+
+def history_to_frame(chart):
+    """
+    Joins the prices, market_caps and total_volumes arrays of a parsed
+    market_chart response (see utils/market_chart.py) into one DataFrame keyed
+    by millisecond timestamp.
+    """
+    timestamps, prices = chart["prices"]
+    df = pd.DataFrame({"timestamp": timestamps, "current_price": prices})
+    for key, column in (("market_caps", "market_cap"), ("total_volumes", "total_volume")):
+        series_timestamps, values = chart[key]
+        if np.array_equal(series_timestamps, timestamps):
+            df[column] = values
+        else:
+            # The series occasionally disagree on timestamps, align them on the price timestamps
+            aligned = pd.Series(values, index=series_timestamps).groupby(level=0).last()
+            df[column] = aligned.reindex(timestamps).to_numpy()
+    return df.drop_duplicates("timestamp", keep="last").sort_values("timestamp")[HISTORY_COLUMNS]
+
+
+def _thin(df, last_ms, min_interval_ms):
+    # Drop points closer than min_interval_ms to the previously kept one
+    keep = []
+    for ts in df["timestamp"]:
+        if last_ms is None or ts - last_ms >= min_interval_ms:
+            keep.append(True)
+            last_ms = ts
+        else:
+            keep.append(False)
+    return df[keep]
+
+
+def _seed_timeseries(coin_id, path, store):
+    # Coins synced before the memory-mapped store existed get their CSV history copied over once
+    if store.length(coin_id) or not os.path.exists(path):
+        return
+    df = pd.read_csv(path, parse_dates=["timestamp"])
+    columns = {column: df[column].to_numpy() for column in HISTORY_COLUMNS[1:]}
+    columns["timestamp"] = df["timestamp"].to_numpy("datetime64[ms]").astype("int64")
+    store.append(coin_id, columns)
+
+
+def _seed_sqlite(coin_id, path, sqlite):
+    # Same one-off copy for the optional SQLite prices table
+    if sqlite.price_at(coin_id, pd.Timestamp.max) is not None or not os.path.exists(path):
+        return
+    sqlite.write("prices", pd.read_csv(path, parse_dates=["timestamp"]).assign(id=coin_id))
+
+
+def sync_coin_history(coin_id, data_dir=DATA_DIR, initial_days=INITIAL_DAYS,
+                      min_interval_ms=MIN_INTERVAL_MS, state_path=SYNC_STATE_PATH, store=None):
+    """
+    Appends only the points missing since the last sync to {coin_id}_historical_price.csv
+    and to the coin's memory-mapped series.
+
+    Coins without a high-water mark (or whose CSV is gone) are backfilled with
+    initial_days of history. Later runs request /market_chart/range from the
+    last ingested timestamp to now, which CoinGecko answers at 5-minute
+    granularity for short spans; those points are thinned to min_interval_ms so
+    the file keeps one resolution. Each coin's sync holds a file lock under
+    data_dir/locks/, so main.py and the scheduler never ingest the same points twice.
+
+    Args:
+        coin_id (str): CoinGecko coin id.
+        data_dir (str): Directory holding the historical CSVs.
+        initial_days (int): Backfill window for first-time syncs.
+        min_interval_ms (int): Minimum spacing between appended rows.
+        state_path (str): JSON file with per-coin high-water marks.
+        store (TimeSeriesStore, optional): Series store to append to. Defaults to the shared one.
+
+    Returns:
+        pd.DataFrame or None: The newly appended rows (possibly empty), None if the fetch failed.
+    """
+    path = history_path(coin_id, data_dir)
+    store = store or timeseries
+    # One sync per coin across processes (main.py, scheduler): the mark read, fetch, append and mark write form one unit
+    with file_lock(_sync_lock_path(coin_id, data_dir)):
+        last_ms = load_sync_state(state_path).get(coin_id)
+        if last_ms is not None and not os.path.exists(path):
+            last_ms = None
+        sqlite = default_store()
+        if last_ms is not None:
+            _seed_timeseries(coin_id, path, store)
+            if sqlite is not None:
+                _seed_sqlite(coin_id, path, sqlite)
+
+        now = int(time.time())
+        from_ts = now - initial_days * 86400 if last_ms is None else last_ms // 1000
+        chart = get_coin_history_range(coin_id, from_ts, now, as_arrays=True)
+        if chart is None:
+            log_error(f"History sync for {coin_id} failed to fetch data.")
+            return None
+
+        df = history_to_frame(chart)
+        if last_ms is not None:
+            df = df[df["timestamp"] > last_ms]
+        df = _thin(df, last_ms, min_interval_ms)
+        if df.empty:
+            log_info(f"History for {coin_id} already up to date.")
+            return df
+
+        new_rows = df.copy()
+        new_rows["timestamp"] = pd.to_datetime(new_rows["timestamp"], unit="ms")
+        os.makedirs(data_dir, exist_ok=True)
+        if last_ms is None:
+            # A fresh backfill replaces any leftover file in one step
+            write_atomic(path, lambda f: new_rows.to_csv(f, index=False))
+        else:
+            new_rows.to_csv(path, mode='a', header=False, index=False)
+        store.append(coin_id, {column: df[column].to_numpy() for column in HISTORY_COLUMNS})
+        if sqlite is not None:
+            sqlite.write("prices", new_rows.assign(id=coin_id))
+        _set_high_water_mark(coin_id, df["timestamp"].iloc[-1], state_path)
+        log_info(f"History sync for {coin_id}: appended {len(new_rows)} rows to {path}.")
+        return new_rows
+
+
+def iter_coin_history_syncs(coin_ids, data_dir=DATA_DIR, max_workers=MAX_WORKERS, **kwargs):
+    """
+    Runs sync_coin_history for several coins on the shared bounded pool and
+    yields (coin_id, new rows or None) as each finishes, so per-coin work
+    downstream can start before the slowest request returns.
+    """
+    return iter_concurrent(functools.partial(sync_coin_history, data_dir=data_dir, **kwargs), coin_ids, max_workers=max_workers)
+
+
+def sync_coin_histories(coin_ids, data_dir=DATA_DIR, max_workers=MAX_WORKERS, **kwargs):
+    """Blocking variant of iter_coin_history_syncs, returns {coin_id: new rows or None}."""
+    return dict(iter_coin_history_syncs(coin_ids, data_dir, max_workers, **kwargs))
+
+
+def load_history(coin_id, start=None, end=None, store=None):
+    """
+    Reads a coin's synced history for a time range from the memory-mapped store.
+
+    Returns:
+        pd.DataFrame: Columns timestamp, current_price, market_cap, total_volume; empty if never synced.
+    """
+    return (store or timeseries).to_frame(coin_id, start, end)[HISTORY_COLUMNS]
@@ -1,4 +1,5 @@
 # indicators/ta_utils.py
+import os
 import pandas as pd
 import ta
 from ..logger import setup_logger, log_info, log_error # Import logger from parent directory
@@ -7,6 +8,8 @@ from ..logger import setup_logger, log_info, log_error # Import logger from pare
 def compute_indicators(df_or_path, output_csv=None):
     """
     Computes technical indicators (RSI, EMA, MACD, Bollinger Bands) for price data.
+    When the input carries high/low candles (e.g. from candle_store.load_candles),
+    the range-based Average True Range is added as well.
 
     Args:
         df_or_path (pd.DataFrame or str): Input data as a DataFrame or path to a CSV file.
@@ -39,6 +42,9 @@ def compute_indicators(df_or_path, output_csv=None):
         df["timestamp"] = pd.to_datetime(df["timestamp"])
         df = df.sort_values("timestamp")
 
+        # OHLC candles allow range-based indicators; close-only snapshots skip them
+        has_range = "high" in df.columns and "low" in df.columns
+
         # Compute Indicators - Handle potential errors or insufficient data for windows
         if len(df) > 14: # Minimum required for RSI default window
             try:
@@ -47,6 +53,13 @@ def compute_indicators(df_or_path, output_csv=None):
                  log_error(f"Error computing RSI: {e}")
                  df["rsi"] = pd.NA # Assign pandas NA on error or insufficient data
 
+            if has_range:
+                try:
+                    df["atr"] = ta.volatility.AverageTrueRange(df["high"], df["low"], df["close"], window=14).average_true_range()
+                except Exception as e:
+                    log_error(f"Error computing ATR: {e}")
+                    df["atr"] = pd.NA
+
             if len(df) > 20: # Minimum required for EMA and BB default window
                  try:
                      df["ema_20"] = ta.trend.EMAIndicator(df["close"], window=20).ema_indicator()
@@ -87,6 +100,8 @@ def compute_indicators(df_or_path, output_csv=None):
             df["bb_upper"] = pd.NA
             df["bb_lower"] = pd.NA
             df["macd_diff"] = pd.NA
+            if has_range:
+                df["atr"] = pd.NA
 
         df["processed_timestamp"] = pd.Timestamp.utcnow().isoformat()
 
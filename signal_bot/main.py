@@ -1,13 +1,17 @@
 # main.py
 import pandas as pd
 import os
-from .utils.coingecko_api import get_top_coins, get_coin_history
+from .utils.coingecko_api import get_top_coins
+from .history_sync import iter_coin_history_syncs, history_path, load_history
 from .indicators.ta_utils import compute_indicators
 # from .signals.generate_signals import generate_signal
 from .signals.signal_finder import find_signals
 from .anomaly_detector import detect_anomalies
+from .snapshot_store import SNAPSHOT_STORE_DIR
 from .ml_logger import log_ml_features
 from .backtester import backtest_signals
+from .sqlite_store import default_store
+from .publisher import publish_csv, write_csv_atomic, persist_async, flush_writes
 from .ml_model_trainer import train_ml_model
 from .logger import setup_logger, log_info, log_error
 from .exporter import export_to_excel, export_to_html
@@ -15,38 +19,73 @@ from .exporter import export_to_excel, export_to_html
 DATA_DIR = 'signal_bot/data'
 os.makedirs(DATA_DIR, exist_ok=True)
 
+def _process_history(coin_id, new_rows):
+    """
+    Computes indicators and signals for one coin's synced history and backtests them.
+
+    Returns:
+        tuple: (signals, backtest results) DataFrames.
+    """
+    log_info(f"Historical data synced for {coin_id} ({new_rows} new rows).")
+    # Read from the memory-mapped series instead of re-parsing the whole CSV
+    history_df = load_history(coin_id)
+    history_df["id"] = coin_id # Signals need the coin key for backtesting
+
+    log_info(f"Computing technical indicators for {coin_id} historical data...")
+    history_df["close"] = history_df["current_price"]
+    history_df_ind = compute_indicators(history_df.copy())
+    persist_async(write_csv_atomic, history_df_ind, os.path.join(DATA_DIR, f"{coin_id}_historical_with_indicators.csv"))
+
+    log_info(f"Generating signals for {coin_id} historical data...")
+    history_df_signals = find_signals(history_df_ind.copy())
+    persist_async(write_csv_atomic, history_df_signals, os.path.join(DATA_DIR, f"{coin_id}_historical_signals.csv"))
+
+    log_info(f"Attempting to backtest historical signals for {coin_id}...")
+    # Signals and prices are the in-memory frames; with SIGNAL_BOT_SQLITE=1 prices come from indexed lookups instead.
+    # One coin per call, the backtester's forward window walks a single coin's price rows
+    backtest_results_df = backtest_signals(history_df_signals, history_df, store=default_store())
+    log_info(f"Backtesting completed for {coin_id}.")
+    return history_df_signals, backtest_results_df
+
+
 def main():
     setup_logger()
     log_info("Starting bot pipeline...")
 
     # --- Data Collection (using existing top 10 fetch for now) ---
     log_info("--- Top 10 Data Pipeline ---")
+    history_coin_ids = ["bitcoin"] # Replaced by the top 10 ids once they are fetched
     print("Fetching top 10 coin data...")
     try:
         data = get_top_coins()
         if data is not None:
             df_top10 = pd.DataFrame(data)
             df_top10["timestamp"] = pd.Timestamp.utcnow()
+            history_coin_ids = df_top10["id"].tolist()
             top10_market_data_path = os.path.join(DATA_DIR, "top10_market_data.csv")
-            df_top10.to_csv(top10_market_data_path, index=False)
-            log_info("Top 10 data fetched and saved.")
+            # Stages hand DataFrames to each other in-process; the CSVs are written on the
+            # background writer, so frames are not modified once handed to persist_async
+            persist_async(write_csv_atomic, df_top10, top10_market_data_path)
+            log_info("Top 10 data fetched, saving in the background.")
 
             log_info("Computing technical indicators for top 10 data...")
-            df_top10["close"] = df_top10["current_price"]
-            df_ind_top10 = compute_indicators(df_top10.copy())
+            df_ind_top10 = compute_indicators(df_top10) # Works on its own copy and derives 'close' from 'current_price'
+            if df_ind_top10.empty:
+                # compute_indicators returns an empty frame on error; publishing it would replace the last good generation
+                raise ValueError("indicator computation returned no rows")
             top10_indicators_path = os.path.join(DATA_DIR, "top10_with_indicators.csv")
-            df_ind_top10.to_csv(top10_indicators_path, index=False)
-            log_info("Indicators computed and saved for top 10 data.")
+            persist_async(publish_csv, "top10_with_indicators", df_ind_top10, mirror_path=top10_indicators_path)
+            log_info("Indicators computed for top 10 data.")
 
             log_info("Generating signals for top 10 snapshot data...")
             df_signals_top10 = find_signals(df_ind_top10.copy())
             top10_signals_path = os.path.join(DATA_DIR, "top10_signals.csv")
-            df_signals_top10.to_csv(top10_signals_path, index=False)
-            log_info("Signals generated and saved for top 10 snapshot data.")
+            persist_async(publish_csv, "top10_signals", df_signals_top10, mirror_path=top10_signals_path)
+            log_info("Signals generated for top 10 snapshot data.")
 
             log_info("Logging ML features for top 10 data...")
             ml_log_path = os.path.join(DATA_DIR, "ml_training.csv")
-            log_ml_features(top10_indicators_path, ml_log_path)
+            log_ml_features(df_ind_top10, ml_log_path)
             log_info("ML features logged for top 10 data.")
 
         else:
@@ -62,7 +101,10 @@ def main():
     # --- Anomaly Detection ---
     log_info("\n--- Anomaly Detection Pipeline ---")
     print("Attempting to run Anomaly Detection...")
-    full_snapshot_path = os.path.join(DATA_DIR, "full_market_snapshot.csv")
+    # Prefer the partitioned snapshot store, fall back to a legacy snapshot CSV
+    full_snapshot_path = SNAPSHOT_STORE_DIR
+    if not os.path.isdir(full_snapshot_path):
+        full_snapshot_path = os.path.join(DATA_DIR, "full_market_snapshot.csv")
     anomalies_output_dir = DATA_DIR
 
     if os.path.exists(full_snapshot_path):
@@ -84,89 +126,71 @@ def main():
 
     # --- Historical Data Processing ---
     log_info("\n--- Historical Data Pipeline ---")
-    coin_id = "bitcoin"
     history_df_signals_display = pd.DataFrame()
-    historical_price_data_path = os.path.join(DATA_DIR, f"{coin_id}_historical_price.csv")
-    historical_signals_path = os.path.join(DATA_DIR, f"{coin_id}_historical_signals.csv")
     backtest_results_path = os.path.join(DATA_DIR, "signal_backtest.csv")
 
 
-    print(f"Attempting to fetch and process historical data for {coin_id}...")
+    print(f"Attempting to fetch and process historical data for {len(history_coin_ids)} coins...")
     try:
-        history_data = get_coin_history(coin_id, days="30")
-        if history_data is not None and "prices" in history_data:
-            log_info("Historical data fetched.")
-            history_df = pd.DataFrame(history_data["prices"], columns=["timestamp", "current_price"])
-            history_df["timestamp"] = pd.to_datetime(history_df["timestamp"], unit="ms")
-            history_df.to_csv(historical_price_data_path, index=False)
-            log_info("Historical data processed and saved.")
-
-            log_info(f"Computing technical indicators for {coin_id} historical data...")
-            history_df["close"] = history_df["current_price"]
-            history_df_ind = compute_indicators(history_df.copy())
-            history_historical_indicators_path = os.path.join(DATA_DIR, f"{coin_id}_historical_with_indicators.csv")
-            history_df_ind.to_csv(history_historical_indicators_path, index=False)
-            log_info("Indicators computed and saved for historical data.")
-
-            log_info(f"Generating signals for {coin_id} historical data...")
-            history_df_signals = find_signals(history_df_ind.copy())
-            history_signals_path = os.path.join(DATA_DIR, f"{coin_id}_historical_signals.csv")
-            history_df_signals.to_csv(history_signals_path, index=False)
-            log_info("Historical signals generated and saved.")
-            history_df_signals_display = history_df_signals
-
-            # --- Backtesting Historical Signals ---
-            log_info(f"Attempting to backtest historical signals for {coin_id}...")
-            backtest_results_df = backtest_signals(historical_signals_path, historical_price_data_path)
-            log_info("Backtesting completed.")
-            if not backtest_results_df.empty:
-                print("Backtest Results (head):")
-                print(backtest_results_df.head().to_markdown(index=False))
-
-                # --- Export Backtest Results ---
-                log_info("Exporting backtest results...")
-                excel_output_path = os.path.join(DATA_DIR, "signal_backtest_report.xlsx")
-                html_output_path = os.path.join(DATA_DIR, "signal_backtest_report.html")
-                export_to_excel(backtest_results_path, excel_output_path)
-                export_to_html(backtest_results_path, html_output_path)
-                log_info(f"Backtest results exported to {excel_output_path} and {html_output_path}.")
-
-
-                # --- ML Model Training ---
-                log_info("Attempting to train ML model...")
-                if os.path.exists(backtest_results_path):
-                    try:
-                        model, report = train_ml_model(backtest_results_path)
-                        log_info("ML model training completed.")
-                        print("Classification Report:")
-                        for label, metrics in report.items():
-                             if isinstance(metrics, dict):
-                                  print(f"  {label}:")
-                                  for metric, value in metrics.items():
-                                       print(f"    {metric}: {value:.4f}")
-                             else:
-                                  print(f"  {label}: {metrics:.4f}")
-
-                        # Optional: Save the trained model
-                        # import joblib
-                        # joblib.dump(model, os.path.join(DATA_DIR, 'ml_model.pkl'))
-                        # log_info("ML model saved.")
-
-
-                    except ValueError as ve:
-                        log_error(f"Error during ML training: {ve}. Skipping training.")
-                    except Exception as e:
-                        log_error(f"Error during ML training: {e}. Skipping training.")
-                else:
-                    log_info(f"Warning: Backtest results file not found at {backtest_results_path}. Skipping ML model training.")
-
-
-            else:
-                log_info("No backtest results to display. Skipping ML model training.")
+        signal_frames, backtest_frames = [], []
+        # Histories sync concurrently; each coin is analysed as soon as its own sync finishes
+        for coin_id, new_history_rows in iter_coin_history_syncs(history_coin_ids):
+            if new_history_rows is None or not os.path.exists(history_path(coin_id)):
+                log_info(f"Historical data sync failed for {coin_id}. Skipping its signals and backtest.")
+                continue
+            try:
+                history_df_signals, backtest_results_df = _process_history(coin_id, len(new_history_rows))
+                signal_frames.append(history_df_signals)
+                backtest_frames.append(backtest_results_df)
+            except Exception as e:
+                log_error(f"Error processing historical data for {coin_id}: {e}. Skipping its signals.")
+
+        if signal_frames:
+            history_df_signals_display = pd.concat(signal_frames, ignore_index=True)
+        backtest_results_df = pd.concat(backtest_frames, ignore_index=True) if backtest_frames else pd.DataFrame()
+        if not backtest_results_df.empty:
+            print("Backtest Results (head):")
+            print(backtest_results_df.head().to_markdown(index=False))
+            # Written synchronously, the exports and the trainer read it right away
+            write_csv_atomic(backtest_results_df, backtest_results_path)
+
+            # --- Export Backtest Results ---
+            log_info("Exporting backtest results...")
+            excel_output_path = os.path.join(DATA_DIR, "signal_backtest_report.xlsx")
+            html_output_path = os.path.join(DATA_DIR, "signal_backtest_report.html")
+            export_to_excel(backtest_results_path, excel_output_path)
+            export_to_html(backtest_results_path, html_output_path)
+            log_info(f"Backtest results exported to {excel_output_path} and {html_output_path}.")
+
+
+            # --- ML Model Training ---
+            log_info("Attempting to train ML model...")
+            try:
+                model, report = train_ml_model(backtest_results_path)
+                log_info("ML model training completed.")
+                print("Classification Report:")
+                for label, metrics in report.items():
+                     if isinstance(metrics, dict):
+                          print(f"  {label}:")
+                          for metric, value in metrics.items():
+                               print(f"    {metric}: {value:.4f}")
+                     else:
+                          print(f"  {label}: {metrics:.4f}")
+
+                # Optional: Save the trained model
+                # import joblib
+                # joblib.dump(model, os.path.join(DATA_DIR, 'ml_model.pkl'))
+                # log_info("ML model saved.")
+
+
+            except ValueError as ve:
+                log_error(f"Error during ML training: {ve}. Skipping training.")
+            except Exception as e:
+                log_error(f"Error during ML training: {e}. Skipping training.")
 
 
         else:
-             log_info("Historical data fetching failed or 'prices' key not found. Skipping historical data processing and backtesting.")
+            log_info("No backtest results to display. Skipping ML model training.")
 
 
     except Exception as e:
@@ -186,13 +210,14 @@ def main():
     if 'history_df_signals_display' in locals() and not history_df_signals_display.empty:
          print("Historical signals (tail):")
          print(history_df_signals_display.tail().to_markdown(index=False))
-         print("
-Historical signals (sample):")
+         print("\nHistorical signals (sample):")
          print(history_df_signals_display.sample(min(5, len(history_df_signals_display))).to_markdown(index=False))
     else:
          print("No historical signals generated or historical data processing skipped.")
 
-
+    failed_writes = flush_writes()
+    if failed_writes:
+        log_error(f"{failed_writes} background writes failed.")
     log_info("Bot pipeline finished.")
 
 
@@ -2,11 +2,46 @@ ml_logger_content = """# ml_logger.py
 import pandas as pd
 import os
 from datetime import datetime
+from .utils.key_index import KeyIndex
+
+def _timestamp_ms(timestamps):
+    # Epoch milliseconds regardless of the datetime resolution pandas picked
+    return ((timestamps - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(milliseconds=1)).to_numpy("int64")
+
+def _key_index(output_csv):
+    # The (id, timestamp) keys of ml_training.csv live next to it in ml_training_index/
+    return KeyIndex(f"{os.path.splitext(output_csv)[0]}_index")
+
+def _backfill_key_index(index, output_csv):
+    if not index.exists() and os.path.exists(output_csv):
+        # One-off build for logs written before the index existed
+        keys = pd.read_csv(output_csv, usecols=["id", "timestamp"])
+        keys["timestamp"] = pd.to_datetime(keys["timestamp"], utc=True)
+        keys = keys.drop_duplicates().sort_values(["id", "timestamp"])
+        index.add(keys["id"], _timestamp_ms(keys["timestamp"]))
 
 def log_ml_features(indicator_csv, output_csv):
-    """Append new features to ML training dataset."""
+    """
+    Append new features to ML training dataset.
+
+    The log is append-only: rows whose (id, timestamp) key is already in the
+    persistent key index are skipped, and only the remaining rows are appended,
+    so each tick costs the same however large ml_training.csv grows.
+
+    Args:
+        indicator_csv (str or pd.DataFrame): Indicator rows, or a path to a CSV of them.
+                                             Passing the DataFrame skips the CSV round trip.
+        output_csv (str): The training log to append to.
+
+    Returns:
+        pd.DataFrame: The rows appended this call (empty if none were new).
+    """
     try:
-        df = pd.read_csv(indicator_csv)
+        if isinstance(indicator_csv, pd.DataFrame):
+            df = indicator_csv.copy()
+            indicator_csv = "the provided DataFrame" # Only used in messages from here on
+        else:
+            df = pd.read_csv(indicator_csv)
 
         required_features = [
             "id", "timestamp", "current_price",
@@ -35,22 +70,29 @@ def log_ml_features(indicator_csv, output_csv):
 
 
         features = df[required_features].copy()
-
-        if os.path.exists(output_csv):
-            existing = pd.read_csv(output_csv)
-            # Ensure timestamp is datetime for correct dropping duplicates
-            existing['timestamp'] = pd.to_datetime(existing['timestamp'])
-            features['timestamp'] = pd.to_datetime(features['timestamp'])
-
-            combined = pd.concat([existing, features]).drop_duplicates(subset=["id", "timestamp"]).sort_values(by=["id", "timestamp"])
-        else:
-            combined = features
+        features['timestamp'] = pd.to_datetime(features['timestamp'], utc=True)
 
         # Ensure output directory exists
         os.makedirs(os.path.dirname(output_csv) if os.path.dirname(output_csv) else '.', exist_ok=True)
 
-        combined.to_csv(output_csv, index=False)
-        return combined
+        keys_ms = _timestamp_ms(features['timestamp'])
+        # main.py and the scheduler log from separate processes; holding the lock from the
+        # dedupe check to the key update keeps both from appending the same rows
+        index = _key_index(output_csv)
+        with index.lock():
+            _backfill_key_index(index, output_csv)
+            is_new = index.filter_new(features['id'], keys_ms)
+            new_rows = features[is_new]
+            if new_rows.empty:
+                return new_rows
+
+            # The log stores naive UTC timestamps; tz-aware '+00:00' rows would leave the column unparseable as one dtype
+            new_rows = new_rows.assign(timestamp=new_rows['timestamp'].dt.tz_convert(None))
+
+            # Rows go to the log first, keys second: a crash in between re-logs rows rather than losing them
+            new_rows.to_csv(output_csv, mode='a', header=not os.path.exists(output_csv), index=False)
+            index.add(new_rows['id'], keys_ms[is_new])
+            return new_rows
 
     except FileNotFoundError:
         print(f"Error: Input file for ML logging not found at {indicator_csv}. Skipping logging.")
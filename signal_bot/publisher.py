@@ -0,0 +1,133 @@
+# publisher.py
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+import pandas as pd
+from .utils.atomic_write import write_atomic, write_json_atomic
+from .utils.file_lock import file_lock
+from .logger import log_error
+
+DATA_DIR = 'signal_bot/data'
+PUBLISH_DIR = os.path.join(DATA_DIR, "published")
+MANIFEST_NAME = "MANIFEST.json"
+KEEP_GENERATIONS = 3 # Older generations stay readable for readers that resolved the manifest just before a publish
+
+
+def write_csv_atomic(df, path):
+    """Atomic replacement for df.to_csv(path, index=False)."""
+    write_atomic(path, lambda f: df.to_csv(f, index=False))
+
+
+def _manifest_path(name, root):
+    return os.path.join(root, name, MANIFEST_NAME)
+
+
+def read_manifest(name, root=PUBLISH_DIR):
+    """Returns the manifest of a published dataset, or None if it was never published."""
+    try:
+        with open(_manifest_path(name, root)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def publish_csv(name, df, root=PUBLISH_DIR, keep=KEEP_GENERATIONS, mirror_path=None):
+    """
+    Publishes a DataFrame as the next generation of a named dataset.
+
+    The generation file is written and fsynced under its own name first; the
+    manifest pointing at it is then swapped in with an atomic rename. Readers
+    follow the manifest without taking locks and always get a complete file,
+    and the writer never waits for them. Writers of the same dataset (main.py
+    and the scheduler) take a file lock on its directory, so each generation
+    is claimed once. Only the newest keep generations are retained.
+
+    Args:
+        name (str): Dataset name, e.g. "top10_signals".
+        df (pd.DataFrame): Contents to publish.
+        root (str): Directory holding one sub-directory per dataset.
+        keep (int): Generations to retain.
+        mirror_path (str, optional): Fixed-name CSV (e.g. data/top10_signals.csv) to
+                                     replace atomically as well, for readers that
+                                     do not follow the manifest.
+
+    Returns:
+        str: Path of the published generation file.
+    """
+    dataset_dir = os.path.join(root, name)
+    with file_lock(os.path.join(dataset_dir, ".lock")):
+        manifest = read_manifest(name, root) or {}
+        generation = manifest.get("generation", 0) + 1
+        file_name = f"gen-{generation:08d}.csv"
+        path = os.path.join(dataset_dir, file_name)
+        write_csv_atomic(df, path)
+
+        manifest = {"generation": generation, "file": file_name, "rows": len(df), "published_at": time.time()}
+        write_json_atomic(_manifest_path(name, root), manifest)
+        if mirror_path:
+            write_csv_atomic(df, mirror_path)
+
+        for old in sorted(f for f in os.listdir(dataset_dir) if f.startswith("gen-") and f.endswith(".csv"))[:-keep]:
+            try:
+                os.remove(os.path.join(dataset_dir, old))
+            except FileNotFoundError:
+                pass
+    return path
+
+
+def latest_path(name, root=PUBLISH_DIR):
+    """Path of the latest complete generation of a dataset, or None if none was published."""
+    manifest = read_manifest(name, root)
+    return None if manifest is None else os.path.join(root, name, manifest["file"])
+
+
+def read_published(name, root=PUBLISH_DIR, **read_csv_kwargs):
+    """Reads the latest generation of a dataset, or returns None if none was published."""
+    path = latest_path(name, root)
+    return None if path is None else pd.read_csv(path, **read_csv_kwargs)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+_pending = []
+
+
+def _log_failure(future):
+    if not future.cancelled() and future.exception() is not None:
+        log_error(f"Background write failed: {future.exception()}")
+
+
+def persist_async(write, *args, **kwargs):
+    """
+    Queues a persistence call (e.g. publish_csv or write_csv_atomic) on a
+    single background thread and returns its Future at once, so the next
+    stage can start on the in-memory frame instead of waiting for the file.
+
+    Writes run one at a time in submission order, so generations of the same
+    dataset are still published in order. The caller must not modify a
+    DataFrame after handing it over. Failures are logged, not raised.
+    """
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="persist")
+        future = _writer.submit(write, *args, **kwargs)
+        future.add_done_callback(_log_failure)
+        _pending[:] = [f for f in _pending if not f.done() or f.exception() is not None] # Keep failures for flush_writes
+        _pending.append(future)
+    return future
+
+
+def flush_writes(timeout=None):
+    """
+    Waits for every queued persist_async call to finish.
+
+    Returns:
+        int: Number of writes that failed or did not finish within timeout.
+    """
+    with _writer_lock:
+        pending, _pending[:] = list(_pending), []
+    done, not_done = wait(pending, timeout=timeout)
+    return len(not_done) + sum(future.exception() is not None for future in done)
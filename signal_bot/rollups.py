@@ -0,0 +1,251 @@
+# rollups.py
+import os
+import shutil
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from .snapshot_store import (
+    SNAPSHOT_STORE_DIR, PRICE_TICKS_DIR, PARTITION_PREFIX, partition_dates, read_snapshots, write_parquet_atomic,
+)
+from .logger import log_info, log_error
+
+DATA_DIR = 'signal_bot/data'
+ROLLUP_DIR = os.path.join(DATA_DIR, "rollups")
+RAW_RETENTION_DAYS = 14 # Raw snapshot partitions older than this are dropped once rolled up
+
+# Finest to coarsest. partition is the span of one rollup file, retention_days=None keeps a tier forever.
+TIERS = [
+    {"name": "5min", "freq": "5min", "partition": "day", "retention_days": 30},
+    {"name": "1h", "freq": "1h", "partition": "day", "retention_days": 365},
+    {"name": "1d", "freq": "1D", "partition": "year", "retention_days": None},
+]
+ROLLUP_COLUMNS = [
+    "id", "timestamp", "open", "high", "low", "close",
+    "total_volume", "market_cap", "price_change_percentage_24h", "samples",
+]
+# How each column folds when buckets are merged into a coarser tier
+_AGGREGATIONS = {
+    "open": "first", "high": "max", "low": "min", "close": "last",
+    "total_volume": "last", "market_cap": "last", "price_change_percentage_24h": "last", "samples": "sum",
+}
+
+
+def _utc(value):
+    if value is None:
+        return None
+    ts = pd.Timestamp(value)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+
+def _partition_key(timestamp, tier):
+    ts = pd.Timestamp(timestamp)
+    return f"{ts.year}-01-01" if tier["partition"] == "year" else ts.strftime("%Y-%m-%d")
+
+
+def _partition_span(tier):
+    return pd.DateOffset(years=1) if tier["partition"] == "year" else pd.Timedelta(days=1)
+
+
+def _tier_dir(tier, root):
+    return os.path.join(root, tier["name"])
+
+
+def _rollup_path(tier, key, root):
+    return os.path.join(_tier_dir(tier, root), f"{PARTITION_PREFIX}{key}", "rollup.parquet")
+
+
+def _aggregate(df, freq):
+    # Folds OHLC rows (raw rows have open == high == low == close) into freq buckets per coin
+    df = df.sort_values(["id", "timestamp"])
+    df["timestamp"] = df["timestamp"].dt.floor(freq)
+    out = df.groupby(["id", "timestamp"], observed=True, sort=True).agg(_AGGREGATIONS).reset_index()
+    return out[ROLLUP_COLUMNS]
+
+
+def _raw_as_ohlc(raw):
+    price = raw["current_price"]
+    return pd.DataFrame({
+        "id": raw["id"].astype(str), "timestamp": raw["timestamp"],
+        "open": price, "high": price, "low": price, "close": price,
+        "total_volume": raw["total_volume"], "market_cap": raw["market_cap"],
+        "price_change_percentage_24h": raw["price_change_percentage_24h"], "samples": 1,
+    })
+
+
+def _read_partition(tier, key, root):
+    path = _rollup_path(tier, key, root)
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=ROLLUP_COLUMNS)
+    df = pq.read_table(path).to_pandas()
+    df["id"] = df["id"].astype(str)
+    return df
+
+
+def _write_partition(tier, key, df, root):
+    path = _rollup_path(tier, key, root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    write_parquet_atomic(pa.Table.from_pandas(df[ROLLUP_COLUMNS], preserve_index=False), path)
+
+
+def rollup_day(date, store_root=SNAPSHOT_STORE_DIR, root=ROLLUP_DIR):
+    """
+    Rebuilds every tier for one UTC day of raw snapshots.
+
+    The 5-minute tier is aggregated from raw rows and each coarser tier from
+    the tier below it. Day-partitioned tiers are rewritten whole; the daily
+    tier's yearly file has just that day's rows replaced. Every file is
+    swapped in atomically, so rebuilding a day (e.g. after late rows) is safe.
+
+    Returns:
+        int: Raw rows rolled up.
+    """
+    day_start = pd.Timestamp(date, tz="UTC")
+    raw = read_snapshots(
+        store_root,
+        columns=["id", "timestamp", "current_price", "total_volume", "market_cap", "price_change_percentage_24h"],
+        start=day_start, end=day_start + pd.Timedelta(days=1) - pd.Timedelta(milliseconds=1),
+    )
+    if raw.empty:
+        return 0
+
+    # Compaction dedupes closed days; today's partition may still hold repeated rows
+    rows = _raw_as_ohlc(raw).drop_duplicates(["id", "timestamp"], keep="last")
+    for tier in TIERS:
+        rows = _aggregate(rows, tier["freq"])
+        key = _partition_key(day_start, tier)
+        if tier["partition"] == "year":
+            # Replace this day's bars inside the yearly file, keep the rest of the year
+            existing = _read_partition(tier, key, root)
+            if not existing.empty:
+                existing = existing[existing["timestamp"].dt.floor("1D") != day_start]
+                rows = pd.concat([existing, rows], ignore_index=True).sort_values(["id", "timestamp"])
+        _write_partition(tier, key, rows, root)
+    return len(raw)
+
+
+def build_rollups(store_root=SNAPSHOT_STORE_DIR, root=ROLLUP_DIR):
+    """
+    Rolls up today and yesterday (which can still receive rows) plus any raw
+    day that has no 5-minute rollup yet, so each run costs about two days of work.
+
+    Returns:
+        list: Dates rolled up.
+    """
+    today = pd.Timestamp.now(tz="UTC").normalize()
+    recent = {(today - pd.Timedelta(days=1)).strftime("%Y-%m-%d"), today.strftime("%Y-%m-%d")}
+    finest = TIERS[0]
+    rolled = []
+    for date in partition_dates(store_root):
+        if date not in recent and os.path.exists(_rollup_path(finest, date, root)):
+            continue
+        try:
+            if rollup_day(date, store_root, root):
+                rolled.append(date)
+        except Exception as e:
+            log_error(f"Error rolling up snapshots for {date}: {e}")
+    log_info(f"Rollups built for {len(rolled)} days.")
+    return rolled
+
+
+def apply_retention(store_root=SNAPSHOT_STORE_DIR, root=ROLLUP_DIR, raw_retention_days=RAW_RETENTION_DAYS,
+                    ticks_root=PRICE_TICKS_DIR):
+    """
+    Drops raw partitions older than raw_retention_days (only once their day
+    is rolled up), price tick partitions older than raw_retention_days (the
+    rolled-up snapshots cover those days) and rollup partitions older than
+    their tier's retention.
+
+    Returns:
+        int: Partitions removed.
+    """
+    today = pd.Timestamp.now(tz="UTC").normalize()
+    removed = 0
+    raw_cutoff = (today - pd.Timedelta(days=raw_retention_days)).strftime("%Y-%m-%d")
+    for date in partition_dates(store_root):
+        if date < raw_cutoff and os.path.exists(_rollup_path(TIERS[0], date, root)):
+            shutil.rmtree(os.path.join(store_root, f"{PARTITION_PREFIX}{date}"))
+            removed += 1
+    for date in partition_dates(ticks_root):
+        if date < raw_cutoff:
+            shutil.rmtree(os.path.join(ticks_root, f"{PARTITION_PREFIX}{date}"))
+            removed += 1
+    for tier in TIERS:
+        if tier["retention_days"] is None or not os.path.isdir(_tier_dir(tier, root)):
+            continue
+        cutoff = today - pd.Timedelta(days=tier["retention_days"])
+        for name in sorted(os.listdir(_tier_dir(tier, root))):
+            start = pd.Timestamp(name[len(PARTITION_PREFIX):], tz="UTC")
+            if start + _partition_span(tier) <= cutoff:
+                shutil.rmtree(os.path.join(_tier_dir(tier, root), name))
+                removed += 1
+    log_info(f"Retention removed {removed} partitions.")
+    return removed
+
+
+def _retained(retention_days, start, now):
+    return retention_days is None or start is None or start >= now - pd.Timedelta(days=retention_days)
+
+
+def pick_tier(start, resolution, now=None):
+    """
+    Returns the coarsest tier whose buckets are no wider than resolution and
+    whose retention still covers start. Below the finest tier, raw snapshots
+    (None) are used while they still cover start; past raw retention the
+    finest tier that does is returned, so a range is never cut short, only
+    served at a coarser resolution than asked for.
+    """
+    now = pd.Timestamp.now(tz="UTC") if now is None else now
+    resolution = pd.Timedelta(resolution)
+    for tier in reversed(TIERS):
+        if pd.Timedelta(tier["freq"]) <= resolution and _retained(tier["retention_days"], start, now):
+            return tier
+    if _retained(RAW_RETENTION_DAYS, start, now):
+        return None
+    # e.g. a 400-day range at 1h: the hourly tier only keeps 365 days, the daily one keeps everything
+    return next(tier for tier in TIERS if _retained(tier["retention_days"], start, now))
+
+
+def query_history(coin_ids=None, start=None, end=None, resolution="1h",
+                  store_root=SNAPSHOT_STORE_DIR, root=ROLLUP_DIR):
+    """
+    Reads per-coin OHLCV history at (at least) the requested resolution from
+    the cheapest source: the coarsest rollup tier that fits, or raw snapshots.
+    A year of daily bars is a single file read, whatever the raw volume was.
+    When nothing that fine is still retained for start, the finest tier that
+    covers the whole range is used instead (see pick_tier).
+
+    Args:
+        coin_ids (list, optional): Coins to keep. Defaults to all.
+        start, end (datetime-like, optional): Inclusive UTC range.
+        resolution (str or Timedelta): Coarsest acceptable bucket, e.g. "5min", "1h", "1D".
+
+    Returns:
+        pd.DataFrame: ROLLUP_COLUMNS rows sorted by (id, timestamp); df.attrs["tier"] names the
+                      source, so callers can tell when bars are coarser than requested.
+    """
+    start, end = _utc(start), _utc(end)
+    tier = pick_tier(start, resolution)
+
+    if tier is None:
+        df = _raw_as_ohlc(read_snapshots(store_root, start=start, end=end))
+    else:
+        frames = []
+        tier_dir = _tier_dir(tier, root)
+        names = sorted(os.listdir(tier_dir)) if os.path.isdir(tier_dir) else []
+        for name in names:
+            key_start = pd.Timestamp(name[len(PARTITION_PREFIX):], tz="UTC")
+            # Partition pruning: skip files entirely outside [start, end]
+            if (end is not None and key_start > end) or (start is not None and key_start + _partition_span(tier) <= start):
+                continue
+            frames.append(_read_partition(tier, name[len(PARTITION_PREFIX):], root))
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=ROLLUP_COLUMNS)
+
+    if coin_ids is not None:
+        df = df[df["id"].isin(coin_ids)]
+    if start is not None:
+        df = df[df["timestamp"] >= start]
+    if end is not None:
+        df = df[df["timestamp"] <= end]
+    df = df.sort_values(["id", "timestamp"]).reset_index(drop=True)
+    df.attrs["tier"] = tier["name"] if tier else "raw"
+    return df
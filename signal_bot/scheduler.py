@@ -1,16 +1,27 @@
 # scheduler.py
 from apscheduler.schedulers.blocking import BlockingScheduler
-from signal_bot.data_collector import collect_data
+from signal_bot.data_collector import collect_data, collect_price_ticks, load_universe
+from signal_bot.fetch_priority import plan_refresh
+from signal_bot.history_sync import sync_coin_histories
+from signal_bot.coin_metadata import refresh_coin_list
+from signal_bot.snapshot_store import SNAPSHOT_STORE_DIR, PRICE_TICKS_DIR, TICK_SCHEMA, compact_snapshots
+from signal_bot.sqlite_store import default_store
+from signal_bot.publisher import publish_csv
+from signal_bot.rollups import build_rollups, apply_retention
+from signal_bot.stage_manifest import StageManifest
+from signal_bot.candle_store import CANDLE_SYNC_COINS, candle_path, latest_atr, sync_candles
 from signal_bot.indicators.ta_utils import compute_indicators
 from signal_bot.signals.signal_finder import find_signals
 from signal_bot.ml_logger import log_ml_features
 from signal_bot.anomaly_detector import detect_anomalies
 import pandas as pd
+import inspect
 import os
 from signal_bot.logger import setup_logger, log_info, log_error
 
 
 scheduler = BlockingScheduler()
+stage_manifest = StageManifest()
 
 @scheduler.scheduled_job('interval', minutes=10)
 def pipeline_job():
@@ -33,21 +44,67 @@ def pipeline_job():
         return
 
     try:
-        log_info("Computing indicators for top 10...")
-        # compute_indicators expects input_csv and output_csv paths
-        df_ind_top10 = compute_indicators(top10_input_path, top10_indicators_path)
-        log_info("Indicators computed for top 10.")
-
-        log_info("Generatingsignals for top 10...")
-        # find_signals expects a DataFrame
-        df_signals_top10 = find_signals(df_ind_top10.copy())
-        df_signals_top10.to_csv(top10_signals_path, index=False)
-        log_info("Signals generated for top 10.")
-
-        log_info("Logging ML features for top 10...")
-        # log_ml_features expects indicator_csv and output_csv paths
-        log_ml_features(top10_indicators_path, ml_log_output_path)
-        log_info("ML features logged for top 10.")
+        store = default_store()
+        # Each stage is skipped when its inputs (data and the code that derives from it) and params are unchanged
+        # Candle files feed the ATR column, so a candle sync also refreshes the indicators
+        candle_files = [path for path in map(candle_path, load_universe()[:CANDLE_SYNC_COINS]) if os.path.exists(path)]
+        ind_inputs = [top10_input_path, inspect.getsourcefile(compute_indicators), *candle_files]
+        ind_params = {"sqlite": store is not None}
+        fresh, fingerprints = stage_manifest.check("indicators", ind_inputs, ind_params, [top10_indicators_path])
+        df_ind_top10 = None
+        if fresh:
+            log_info("Indicators for top 10 are up to date, skipping.")
+        else:
+            log_info("Computing indicators for top 10...")
+            # Outputs are published as new generations, so the dashboard never reads a half-written file
+            df_ind_top10 = compute_indicators(top10_input_path)
+            if df_ind_top10.empty:
+                # compute_indicators returns an empty frame on error: keep the last good generation, retry next run
+                log_error("Indicator computation returned no rows, keeping the last published indicators.")
+                df_ind_top10 = None
+            else:
+                # Snapshots are close-only, the true range comes from the coins' stored OHLC candles
+                df_ind_top10 = df_ind_top10.drop(columns="atr", errors="ignore").merge(
+                    latest_atr(df_ind_top10["id"].unique()), on="id", how="left"
+                )
+                publish_csv("top10_with_indicators", df_ind_top10, mirror_path=top10_indicators_path)
+                if store is not None:
+                    store.write("indicators", df_ind_top10)
+                stage_manifest.record("indicators", fingerprints, ind_params, [top10_indicators_path])
+                log_info("Indicators computed for top 10.")
+
+        sig_inputs = [top10_indicators_path, inspect.getsourcefile(find_signals)]
+        sig_params = {"sqlite": store is not None}
+        fresh, fingerprints = stage_manifest.check("signals", sig_inputs, sig_params, [top10_signals_path])
+        if fresh:
+            log_info("Signals for top 10 are up to date, skipping.")
+        else:
+            log_info("Generatingsignals for top 10...")
+            if df_ind_top10 is None:
+                df_ind_top10 = pd.read_csv(top10_indicators_path, parse_dates=["timestamp"])
+            # find_signals expects a DataFrame
+            df_signals_top10 = find_signals(df_ind_top10.copy())
+            publish_csv("top10_signals", df_signals_top10, mirror_path=top10_signals_path)
+            if store is not None:
+                store.write("signals", df_signals_top10)
+            stage_manifest.record("signals", fingerprints, sig_params, [top10_signals_path])
+            log_info("Signals generated for top 10.")
+
+        ml_inputs = [top10_indicators_path, inspect.getsourcefile(log_ml_features)]
+        fresh, fingerprints = stage_manifest.check("ml_features", ml_inputs, outputs=[ml_log_output_path])
+        if fresh:
+            log_info("ML features for top 10 are up to date, skipping.")
+        else:
+            log_info("Logging ML features for top 10...")
+            # Reuses the indicator frame when it was computed this run, instead of re-parsing its CSV
+            logged = log_ml_features(df_ind_top10 if df_ind_top10 is not None else top10_indicators_path, ml_log_output_path)
+            if logged.empty:
+                # log_ml_features returns an empty frame on error (and when every row was already logged):
+                # leave the stage unrecorded so these indicators are logged again next run
+                log_info("No new ML feature rows for top 10, the stage runs again next time.")
+            else:
+                stage_manifest.record("ml_features", fingerprints, outputs=[ml_log_output_path])
+                log_info(f"ML features logged for top 10 ({len(logged)} rows).")
 
     except Exception as e:
         log_error(f"Error in pipeline job: {e}")
@@ -61,7 +118,10 @@ def anomaly_job():
     log_info("Running anomaly job...")
 
     DATA_DIR = 'signal_bot/data'
-    full_snapshot_path = os.path.join(DATA_DIR, "full_market_snapshot.csv")
+    # Prefer the partitioned snapshot store, fall back to a legacy snapshot CSV
+    full_snapshot_path = SNAPSHOT_STORE_DIR
+    if not os.path.isdir(full_snapshot_path):
+        full_snapshot_path = os.path.join(DATA_DIR, "full_market_snapshot.csv")
     anomalies_output_dir = DATA_DIR
 
     if not os.path.exists(full_snapshot_path):
@@ -70,8 +130,8 @@ def anomaly_job():
 
     try:
         log_info("Running Anomaly Detection...")
-        # detect_anomalies expects snapshot_csv and output_dir
-        path, anomalies = detect_anomalies(full_snapshot_path, anomalies_output_dir)
+        # Only the last day of partitions is opened, and it is streamed in chunks so memory stays fixed
+        path, anomalies = detect_anomalies(full_snapshot_path, anomalies_output_dir, lookback_hours=24, streaming=True)
         log_info(f"Anomaly detection completed. Anomalies saved to {path}. Found {len(anomalies)} anomalies.")
 
     except Exception as e:
@@ -85,6 +145,9 @@ def full_data_collection_job():
     setup_logger()
     log_info("Running full data collection job...")
     try:
+        # /coins/list is cached for a day and only rewritten when its hash changes
+        refresh_coin_list()
+
         # collect_data returns a DataFrame
         collected_df = collect_data(limit=250)
 
@@ -99,5 +162,95 @@ def full_data_collection_job():
     log_info("Full data collection job finished.")
 
 
+@scheduler.scheduled_job('interval', minutes=1)
+def price_tick_job():
+    setup_logger()
+    log_info("Running price tick job...")
+    try:
+        # Batched /simple/price calls, a fraction of the full markets payload
+        ticks_df = collect_price_ticks()
+
+        if ticks_df is not None:
+             log_info(f"Price ticks collected for {len(ticks_df)} coins.")
+        else:
+             log_error("Price tick collection failed or no universe available yet.")
+
+    except Exception as e:
+        log_error(f"Error in price tick job: {e}")
+
+    log_info("Price tick job finished.")
+
+
+@scheduler.scheduled_job('interval', hours=1)
+def candle_sync_job():
+    setup_logger()
+    log_info("Running candle sync job...")
+
+    coin_ids = load_universe()[:CANDLE_SYNC_COINS]
+    if not coin_ids:
+        log_info("Warning: No coin universe available yet. Skipping candle sync job.")
+        return
+
+    try:
+        # OHLC candles for the top coins feed the ATR column of the pipeline's indicators
+        sync_candles(coin_ids)
+    except Exception as e:
+        log_error(f"Error in candle sync job: {e}")
+
+    log_info("Candle sync job finished.")
+
+
+@scheduler.scheduled_job('interval', minutes=10)
+def priority_refresh_job():
+    setup_logger()
+    log_info("Running priority refresh job...")
+
+    coin_ids = load_universe()
+    if not coin_ids:
+        log_info("Warning: No coin universe available yet. Skipping priority refresh job.")
+        return
+
+    try:
+        # Hot coins (signals, anomalies, big 24h moves) are refreshed often, quiet ones rarely, within a fixed call budget
+        queue, batch = plan_refresh(coin_ids)
+        results = sync_coin_histories(batch)
+        refreshed = [coin_id for coin_id, rows in results.items() if rows is not None]
+        queue.mark_refreshed(refreshed)
+        log_info(f"Priority refresh synced history for {len(refreshed)}/{len(batch)} coins.")
+
+    except Exception as e:
+        log_error(f"Error in priority refresh job: {e}")
+
+    log_info("Priority refresh job finished.")
+
+
+@scheduler.scheduled_job('interval', hours=6)
+def snapshot_compaction_job():
+    setup_logger()
+    log_info("Running snapshot compaction job...")
+    try:
+        # Closed date partitions collapse to one sorted, deduped file, so reads stay flat as history grows
+        compact_snapshots()
+        compact_snapshots(PRICE_TICKS_DIR, schema=TICK_SCHEMA) # ~360k tick rows a day at 250 coins
+    except Exception as e:
+        log_error(f"Error in snapshot compaction job: {e}")
+
+    log_info("Snapshot compaction job finished.")
+
+
+@scheduler.scheduled_job('interval', hours=1)
+def rollup_job():
+    setup_logger()
+    log_info("Running rollup job...")
+    try:
+        # 5-minute, hourly and daily bars per coin; raw and fine tiers then age out per their retention
+        build_rollups()
+        apply_retention()
+    except Exception as e:
+        log_error(f"Error in rollup job: {e}")
+
+    log_info("Rollup job finished.")
+
+
 print("Starting scheduler...")
 scheduler.start() # Uncommented to start the scheduler
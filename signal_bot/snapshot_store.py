@@ -0,0 +1,277 @@
+# snapshot_store.py
+import os
+import time
+import uuid
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from .coin_metadata import VOLATILE_COLUMNS, snapshot_facts, update_coin_dimension
+from .dataset_manager import SNAPSHOT_SCHEMA as COLUMN_TYPES
+from .utils.atomic_write import write_atomic
+from .logger import log_info, log_error
+
+DATA_DIR = 'signal_bot/data'
+SNAPSHOT_STORE_DIR = os.path.join(DATA_DIR, "market_snapshots")
+PRICE_TICKS_DIR = os.path.join(DATA_DIR, "price_ticks") # Same layout, for the every-minute /simple/price ticks
+PARTITION_PREFIX = "date="
+PART_PREFIX = "part-"
+COMPACTED_PREFIX = "compacted-"
+STREAM_BATCH_ROWS = 64 * 1024 # Rows per chunk yielded by iter_snapshots
+SUPERSEDED_GRACE_SECONDS = 15 * 60 # Replaced files outlive readers that listed them before a compaction
+
+# Parquet types mirror the in-memory schema of dataset_manager, so reads come back compact
+_ARROW_TYPES = {
+    "category": pa.dictionary(pa.int32(), pa.string()),
+    "epoch_ms": pa.timestamp("ms", tz="UTC"),
+    "float32": pa.float32(),
+    "float64": pa.float64(),
+}
+SNAPSHOT_SCHEMA = pa.schema([
+    pa.field(col, _ARROW_TYPES[COLUMN_TYPES.get(col, "float64")])
+    for col in ["id", "timestamp", *VOLATILE_COLUMNS]
+])
+# Ticks carry only what /simple/price returns, typed as in the full snapshot
+TICK_SCHEMA = pa.schema([
+    SNAPSHOT_SCHEMA.field(col)
+    for col in ["id", "timestamp", "current_price", "price_change_percentage_24h", "total_volume", "last_updated"]
+])
+
+
+def _to_table(df, schema=SNAPSHOT_SCHEMA):
+    # Coerce a snapshot frame to the declared schema; missing columns become nulls
+    df = df.copy()
+    for field in schema:
+        if field.name not in df.columns:
+            df[field.name] = None
+        values = df[field.name]
+        if pa.types.is_timestamp(field.type):
+            if pd.api.types.is_integer_dtype(values):
+                df[field.name] = pd.to_datetime(values, unit="ms", utc=True) # Epoch ms from clean_and_normalize
+            else:
+                # Stored at millisecond precision, which is what the API reports anyway
+                df[field.name] = pd.to_datetime(values, utc=True, errors="coerce").dt.floor("ms")
+        elif pa.types.is_floating(field.type):
+            df[field.name] = pd.to_numeric(values, errors="coerce").astype(field.type.to_pandas_dtype())
+        elif pa.types.is_dictionary(field.type):
+            df[field.name] = values.astype(str).astype("category")
+    return pa.Table.from_pandas(df[schema.names], schema=schema, preserve_index=False)
+
+
+def _utc(value):
+    ts = pd.Timestamp(value)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+
+def _partition_dirs(root, start=None, end=None):
+    # Partition directories whose date overlaps [start, end], pruned by name alone
+    if not os.path.isdir(root):
+        return []
+    start_date = None if start is None else _utc(start).strftime("%Y-%m-%d")
+    end_date = None if end is None else _utc(end).strftime("%Y-%m-%d")
+    selected = []
+    for name in sorted(os.listdir(root)):
+        if not name.startswith(PARTITION_PREFIX):
+            continue
+        date = name[len(PARTITION_PREFIX):]
+        if (start_date and date < start_date) or (end_date and date > end_date):
+            continue
+        selected.append(os.path.join(root, name))
+    return selected
+
+
+def partition_dates(root=SNAPSHOT_STORE_DIR):
+    """Returns the YYYY-MM-DD dates that have a partition in the store, oldest first."""
+    return [os.path.basename(path)[len(PARTITION_PREFIX):] for path in _partition_dirs(root)]
+
+
+def _sequence(name):
+    # part-<ns>-<suffix>.parquet and compacted-<ns>.parquet both carry a monotonic write sequence
+    return int(name.split("-")[1].split(".")[0])
+
+
+def _live_files(partition_dir):
+    """
+    Returns (live, superseded) file paths of a partition.
+
+    A compacted-<ns> file replaces every file with a sequence <= ns, so
+    publishing one is a single atomic rename; the files it replaced stay
+    readable until a later compaction run deletes them.
+    """
+    names = sorted(
+        (name for name in os.listdir(partition_dir)
+         if name.endswith(".parquet") and name.startswith((PART_PREFIX, COMPACTED_PREFIX))),
+        key=_sequence,
+    )
+    compacted = [_sequence(name) for name in names if name.startswith(COMPACTED_PREFIX)]
+    covered = max(compacted) if compacted else -1
+    live, superseded = [], []
+    for name in names:
+        path = os.path.join(partition_dir, name)
+        is_current = name.startswith(COMPACTED_PREFIX) and _sequence(name) == covered
+        (live if is_current or _sequence(name) > covered else superseded).append(path)
+    return live, superseded
+
+
+def _part_files(partition_dir):
+    return _live_files(partition_dir)[0]
+
+
+def write_parquet_atomic(table, path):
+    """Writes a Parquet file under a temporary name and renames it into place."""
+    write_atomic(path, lambda f: pq.write_table(table, f, compression="zstd"))
+
+
+def append_snapshot(df, root=SNAPSHOT_STORE_DIR, schema=SNAPSHOT_SCHEMA):
+    """
+    Appends snapshot rows to the date-partitioned Parquet store.
+
+    Rows are split by the UTC date of their timestamp and each date gets a new
+    part file under root/date=YYYY-MM-DD/, so appends never rewrite history.
+
+    Args:
+        df (pd.DataFrame): Snapshot rows (see coin_metadata.snapshot_facts).
+        root (str): Store directory.
+        schema (pa.Schema): Column types enforced on write.
+
+    Returns:
+        list: Paths of the part files written.
+    """
+    if df is None or df.empty:
+        return []
+    table = _to_table(df, schema)
+    dates = pd.Series(table.column("timestamp").to_pandas()).dt.strftime("%Y-%m-%d")
+    written = []
+    for date in dates.dropna().unique():
+        partition_dir = os.path.join(root, f"{PARTITION_PREFIX}{date}")
+        os.makedirs(partition_dir, exist_ok=True)
+        path = os.path.join(partition_dir, f"{PART_PREFIX}{time.time_ns()}-{uuid.uuid4().hex[:8]}.parquet")
+        write_parquet_atomic(table.filter(pa.array((dates == date).to_numpy())), path)
+        written.append(path)
+    return written
+
+
+def read_snapshots(root=SNAPSHOT_STORE_DIR, columns=None, start=None, end=None, schema=SNAPSHOT_SCHEMA):
+    """
+    Reads snapshot rows, touching only the partitions that overlap the time range.
+
+    Args:
+        root (str): Store directory.
+        columns (list, optional): Columns to read. Defaults to all.
+        start (datetime-like, optional): Inclusive lower bound on timestamp (UTC).
+        end (datetime-like, optional): Inclusive upper bound on timestamp (UTC).
+
+    Returns:
+        pd.DataFrame: Matching rows, empty if the store has none.
+    """
+    dataset, predicate = _dataset(root, start, end, schema)
+    if dataset is None:
+        return pd.DataFrame(columns=columns or schema.names)
+    return dataset.to_table(columns=columns, filter=predicate).to_pandas()
+
+
+def iter_snapshots(root=SNAPSHOT_STORE_DIR, columns=None, start=None, end=None,
+                   batch_rows=STREAM_BATCH_ROWS, schema=SNAPSHOT_SCHEMA):
+    """
+    Streams snapshot rows as DataFrames of at most batch_rows rows, with the
+    same partition pruning and column projection as read_snapshots, so memory
+    stays bounded however much history the range covers.
+    """
+    dataset, predicate = _dataset(root, start, end, schema)
+    if dataset is None:
+        return
+    # Arrow yields at most one batch per part file; small parts are coalesced into exactly batch_rows,
+    # the rows past the cut carry over to the next chunk
+    pending, pending_rows = [], 0
+    for batch in dataset.to_batches(columns=columns, filter=predicate, batch_size=batch_rows):
+        pending.append(batch)
+        pending_rows += batch.num_rows
+        while pending_rows >= batch_rows:
+            table = pa.Table.from_batches(pending)
+            yield table.slice(0, batch_rows).to_pandas()
+            remainder = table.slice(batch_rows)
+            pending, pending_rows = remainder.to_batches(), remainder.num_rows
+    if pending_rows:
+        yield pa.Table.from_batches(pending).to_pandas()
+
+
+def _dataset(root, start, end, schema):
+    # Dataset over the live files of the partitions overlapping [start, end], plus the row filter
+    files = [path for partition in _partition_dirs(root, start, end) for path in _part_files(partition)]
+    if not files:
+        return None, None
+
+    predicate = None
+    if start is not None:
+        predicate = ds.field("timestamp") >= _utc(start)
+    if end is not None:
+        upper = ds.field("timestamp") <= _utc(end)
+        predicate = upper if predicate is None else predicate & upper
+    return ds.dataset(files, schema=schema, format="parquet"), predicate
+
+
+def compact_partition(partition_dir, schema=SNAPSHOT_SCHEMA):
+    """
+    Merges a partition's live files into one file sorted by (id, timestamp),
+    with duplicate rows dropped (the latest write wins).
+
+    Returns:
+        int: Rows in the compacted file, or 0 if there was nothing to compact.
+    """
+    live, _ = _live_files(partition_dir)
+    if not live or (len(live) == 1 and os.path.basename(live[0]).startswith(COMPACTED_PREFIX)):
+        return 0
+    # Files are in write order, so keeping the last duplicate keeps the newest observation
+    df = pd.concat([pq.read_table(path, schema=schema).to_pandas() for path in live], ignore_index=True)
+    df = df.drop_duplicates(["id", "timestamp"], keep="last").sort_values(["id", "timestamp"])
+    covered = max(_sequence(os.path.basename(path)) for path in live)
+    table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+    write_parquet_atomic(table, os.path.join(partition_dir, f"{COMPACTED_PREFIX}{covered}.parquet"))
+    return len(df)
+
+
+def compact_snapshots(root=SNAPSHOT_STORE_DIR, grace_seconds=SUPERSEDED_GRACE_SECONDS, schema=SNAPSHOT_SCHEMA):
+    """
+    Compacts every closed (before today, UTC) partition and deletes files that
+    earlier compactions replaced once they are older than grace_seconds.
+
+    Today's partition is left alone because collect_data is still appending to it.
+    Pass PRICE_TICKS_DIR and TICK_SCHEMA to compact the price tick store.
+
+    Returns:
+        dict: {"compacted": partitions compacted, "deleted": superseded files removed}.
+    """
+    today = pd.Timestamp.now(tz="UTC").strftime("%Y-%m-%d")
+    compacted = deleted = 0
+    for partition_dir in _partition_dirs(root):
+        try:
+            _, superseded = _live_files(partition_dir)
+            for path in superseded:
+                if time.time() - os.path.getmtime(path) >= grace_seconds:
+                    os.remove(path)
+                    deleted += 1
+            if os.path.basename(partition_dir)[len(PARTITION_PREFIX):] < today and compact_partition(partition_dir, schema):
+                compacted += 1
+        except Exception as e:
+            log_error(f"Error compacting snapshot partition {partition_dir}: {e}")
+    log_info(f"Snapshot compaction: {compacted} partitions compacted, {deleted} superseded files removed.")
+    return {"compacted": compacted, "deleted": deleted}
+
+
+def import_csv_snapshot(csv_path, root=SNAPSHOT_STORE_DIR, chunksize=100_000):
+    """
+    One-off migration of a legacy full_market_snapshot.csv into the Parquet store.
+
+    Returns:
+        int: Number of rows imported.
+    """
+    imported = 0
+    try:
+        for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+            update_coin_dimension(chunk) # Wide legacy rows still carry the static fields
+            append_snapshot(snapshot_facts(chunk), root)
+            imported += len(chunk)
+        log_info(f"Imported {imported} rows from {csv_path} into {root}.")
+    except Exception as e:
+        log_error(f"Error importing {csv_path} into the snapshot store: {e}")
+    return imported
@@ -0,0 +1,85 @@
+# sparkline_store.py
+import os
+import numpy as np
+import pandas as pd
+from .utils.npz_series import load_series, merge_series
+from .logger import log_info, log_error
+
+DATA_DIR = 'signal_bot/data'
+SPARKLINE_DIR = os.path.join(DATA_DIR, "sparklines")
+HOUR_MS = 60 * 60 * 1000
+
+
+def _series_path(coin_id, store_dir=SPARKLINE_DIR):
+    return os.path.join(store_dir, f"{coin_id}.npz")
+
+
+def sparkline_to_arrays(coin):
+    """
+    Turns the sparkline_in_7d prices of one /coins/markets row into a timestamped hourly series.
+
+    CoinGecko sends the 168 points without timestamps; the last point is taken
+    to be the hour of last_updated and the earlier ones are spaced one hour apart.
+
+    Args:
+        coin (dict): One row of the /coins/markets response (requested with sparkline=true).
+
+    Returns:
+        tuple: (timestamps int64 ms, prices float64), empty when the row has no sparkline.
+    """
+    prices = ((coin.get("sparkline_in_7d") or {}).get("price")) or []
+    last_updated = pd.to_datetime(coin.get("last_updated"), utc=True, errors="coerce")
+    if not prices or pd.isna(last_updated):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+    values = np.array([np.nan if p is None else p for p in prices], dtype=np.float64)
+    end_ms = (last_updated.value // 1_000_000) // HOUR_MS * HOUR_MS
+    timestamps = end_ms - HOUR_MS * np.arange(len(values) - 1, -1, -1, dtype=np.int64)
+    valid = ~np.isnan(values)
+    return timestamps[valid], values[valid]
+
+
+def harvest_sparklines(market_data, store_dir=SPARKLINE_DIR):
+    """
+    Merges the sparkline_in_7d arrays of a /coins/markets response into the per-coin hourly store.
+
+    Args:
+        market_data (list[dict]): Rows returned by get_top_coins.
+        store_dir (str): Directory with one {coin_id}.npz series per coin.
+
+    Returns:
+        int: Number of coins whose series was updated.
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    updated = 0
+    for coin in market_data or []:
+        coin_id = coin.get("id")
+        timestamps, prices = sparkline_to_arrays(coin)
+        if not coin_id or len(timestamps) == 0:
+            continue
+        try:
+            # Newer observations win when two snapshots cover the same hour
+            merge_series(_series_path(coin_id, store_dir), {"timestamp": timestamps, "price": prices})
+            updated += 1
+        except Exception as e:
+            log_error(f"Error storing sparkline for {coin_id}: {e}")
+    log_info(f"Sparkline series updated for {updated} coins in {store_dir}.")
+    return updated
+
+
+def load_sparkline_series(coin_id, store_dir=SPARKLINE_DIR):
+    """
+    Loads a coin's hourly series in the shape compute_indicators expects.
+
+    Returns:
+        pd.DataFrame: Columns id, timestamp, current_price. Empty if the coin has no stored series.
+    """
+    series = load_series(_series_path(coin_id, store_dir))
+    if series is None:
+        return pd.DataFrame(columns=["id", "timestamp", "current_price"])
+    df = pd.DataFrame({
+        "timestamp": pd.to_datetime(series["timestamp"], unit="ms"),
+        "current_price": series["price"],
+    })
+    df.insert(0, "id", coin_id)
+    return df
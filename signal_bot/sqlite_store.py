@@ -0,0 +1,151 @@
+# sqlite_store.py
+import os
+import sqlite3
+import threading
+import pandas as pd
+
+DATA_DIR = 'signal_bot/data'
+SQLITE_PATH = os.path.join(DATA_DIR, "signal_bot.sqlite")
+SQLITE_ENABLED = os.environ.get("SIGNAL_BOT_SQLITE") == "1" # Opt-in, CSV outputs are always written
+INSERT_BATCH = 1000
+
+# Every table is keyed by (id, timestamp in epoch ms); WITHOUT ROWID stores rows in that key's order
+TABLES = {
+    "prices": {
+        "current_price": "REAL", "market_cap": "REAL", "total_volume": "REAL",
+    },
+    "indicators": {
+        "current_price": "REAL", "rsi": "REAL", "ema_20": "REAL", "macd_diff": "REAL",
+        "bb_upper": "REAL", "bb_lower": "REAL", "atr": "REAL",
+    },
+    "signals": {
+        "current_price": "REAL", "signal": "TEXT",
+    },
+    "backtest_results": {
+        "signal": "TEXT", "price_at_signal": "REAL", "max_future_price": "REAL",
+        "return_pct": "REAL", "success": "INTEGER",
+    },
+}
+
+
+def _to_ms(value):
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert("UTC").tz_localize(None)
+    return ts.value // 1_000_000
+
+
+class SQLiteStore:
+    """
+    Embedded SQLite storage for prices, indicators, signals and backtest results.
+
+    The database runs in WAL mode, so the scheduler's writer and any number of
+    readers (dashboard, backtests) work concurrently without blocking each
+    other. Every table has a composite (id, timestamp) primary key, which
+    turns point and range lookups into index seeks. Writes are batched
+    upserts inside one transaction.
+
+    Args:
+        path (str): SQLite database file.
+    """
+
+    def __init__(self, path=SQLITE_PATH):
+        self.path = path
+        self._local = threading.local() # sqlite3 connections are per thread
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL") # Durable at checkpoints, which is enough for derived data
+            self._local.conn = conn
+            with self._schema_lock:
+                if not self._schema_ready:
+                    for table, columns in TABLES.items():
+                        column_sql = ", ".join(f"{name} {sql_type}" for name, sql_type in columns.items())
+                        conn.execute(
+                            f"CREATE TABLE IF NOT EXISTS {table} (id TEXT NOT NULL, timestamp INTEGER NOT NULL, "
+                            f"{column_sql}, PRIMARY KEY (id, timestamp)) WITHOUT ROWID"
+                        )
+                        # Cross-coin time-range reads (dashboard) seek on timestamp alone
+                        conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_timestamp ON {table} (timestamp)")
+                    conn.commit()
+                    self._schema_ready = True
+        return conn
+
+    def write(self, table, df):
+        """
+        Upserts DataFrame rows into a table; columns the table does not have are ignored.
+
+        Returns:
+            int: Number of rows written.
+        """
+        if df is None or df.empty:
+            return 0
+        columns = ["id", "timestamp", *(col for col in TABLES[table] if col in df.columns)]
+        rows = df[columns].copy()
+        rows["timestamp"] = [_to_ms(ts) for ts in rows["timestamp"]]
+        rows = rows.astype(object).where(rows.notna(), None) # NaN/NA become NULL
+        placeholders = ", ".join("?" for _ in columns)
+        sql = f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+
+        records = list(rows.itertuples(index=False, name=None))
+        conn = self._connect()
+        with conn:
+            for i in range(0, len(records), INSERT_BATCH):
+                conn.executemany(sql, records[i:i + INSERT_BATCH])
+        return len(records)
+
+    def read(self, table, coin_id=None, start=None, end=None, columns=None):
+        """
+        Reads rows for an optional coin and inclusive time range, ordered by (id, timestamp).
+
+        Returns:
+            pd.DataFrame: Rows with 'timestamp' as datetime.
+        """
+        clauses, params = [], []
+        if coin_id is not None:
+            clauses.append("id = ?")
+            params.append(coin_id)
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(_to_ms(start))
+        if end is not None:
+            clauses.append("timestamp <= ?")
+            params.append(_to_ms(end))
+        select = ", ".join(["id", "timestamp", *(columns or TABLES[table])])
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        df = pd.read_sql_query(f"SELECT {select} FROM {table}{where} ORDER BY id, timestamp", self._connect(), params=params)
+        df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
+        return df
+
+    def price_at(self, coin_id, timestamp):
+        """Returns (timestamp_ms, price) of the last price at or before timestamp, or None."""
+        return self._connect().execute(
+            "SELECT timestamp, current_price FROM prices WHERE id = ? AND timestamp <= ? "
+            "ORDER BY timestamp DESC LIMIT 1",
+            (coin_id, _to_ms(timestamp)),
+        ).fetchone()
+
+    def prices_after(self, coin_id, timestamp_ms, limit):
+        """Returns up to limit prices strictly after timestamp_ms, oldest first."""
+        rows = self._connect().execute(
+            "SELECT current_price FROM prices WHERE id = ? AND timestamp > ? ORDER BY timestamp LIMIT ?",
+            (coin_id, int(timestamp_ms), int(limit)),
+        ).fetchall()
+        return [price for (price,) in rows]
+
+
+_default_store = None
+
+
+def default_store():
+    """Returns the shared SQLiteStore when SIGNAL_BOT_SQLITE=1, otherwise None."""
+    global _default_store
+    if SQLITE_ENABLED and _default_store is None:
+        _default_store = SQLiteStore()
+    return _default_store
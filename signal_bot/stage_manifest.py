@@ -0,0 +1,112 @@
+# stage_manifest.py
+import hashlib
+import json
+import os
+import threading
+import time
+from .utils.atomic_write import write_atomic
+
+DATA_DIR = 'signal_bot/data'
+STAGE_MANIFEST_PATH = os.path.join(DATA_DIR, "stage_manifest.json")
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def _hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _hash_params(params):
+    canonical = json.dumps(params or {}, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def fingerprint(path, previous=None):
+    """
+    Fingerprints a file as {size, mtime_ns, sha256}, or returns None if it is missing.
+
+    When previous carries the same size and mtime the stored hash is reused,
+    so an unchanged file costs one stat; the file is only read when its stat
+    changed (a rewrite with identical bytes then still matches on the hash).
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    if previous and previous.get("size") == st.st_size and previous.get("mtime_ns") == st.st_mtime_ns:
+        return dict(previous)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": _hash_file(path)}
+
+
+class StageManifest:
+    """
+    Records what each derived artifact was built from, so a stage whose
+    inputs and parameters are unchanged can be skipped.
+
+    Every stage entry keeps a fingerprint per input file, a hash of the
+    stage's parameters and the outputs it produced. A stage is fresh when its
+    parameters match, its outputs still exist and every input matches its
+    fingerprint, checked by stat first and by content hash only if the stat
+    moved. Chained stages therefore skip even when an upstream stage rewrote
+    its output with the same bytes.
+
+    Args:
+        path (str): JSON manifest file.
+    """
+
+    def __init__(self, path=STAGE_MANIFEST_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path) as f:
+                self._stages = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._stages = {}
+
+    def _save(self):
+        payload = json.dumps(self._stages, sort_keys=True).encode("utf-8")
+        write_atomic(self.path, lambda f: f.write(payload))
+
+    def check(self, stage, inputs, params=None, outputs=()):
+        """
+        Fingerprints a stage's inputs and compares them with its last recorded run.
+
+        Args:
+            stage (str): Stage name, e.g. "indicators".
+            inputs (list): Paths the stage reads (data files, and the code that shapes them).
+            params (dict, optional): Parameters that change the result.
+            outputs (iterable): Paths the stage writes; a missing output makes the stage stale.
+
+        Returns:
+            tuple: (fresh, fingerprints). Pass fingerprints to record() after running a
+                   stale stage; they are taken before the run, so an input rewritten
+                   mid-run is seen as changed next time.
+        """
+        entry = self._stages.get(stage) or {}
+        recorded = entry.get("inputs", {})
+        fingerprints = {path: fingerprint(path, recorded.get(path)) for path in inputs}
+        fresh = (
+            bool(entry)
+            and entry.get("params") == _hash_params(params)
+            and all(os.path.exists(path) for path in outputs)
+            and set(recorded) == set(fingerprints)
+            and all(fp is not None and fp["sha256"] == recorded[path]["sha256"] for path, fp in fingerprints.items())
+        )
+        if fresh and fingerprints != recorded:
+            # Same bytes under a new mtime (e.g. rewritten unchanged): keep the new stat so the next check is stat-only
+            with self._lock:
+                entry["inputs"] = fingerprints
+                self._save()
+        return fresh, fingerprints
+
+    def record(self, stage, fingerprints, params=None, outputs=()):
+        """Stores the input fingerprints (from check()) of a stage that just ran successfully."""
+        with self._lock:
+            self._stages[stage] = {
+                "inputs": {path: fp for path, fp in fingerprints.items() if fp is not None},
+                "params": _hash_params(params), "outputs": list(outputs), "recorded_at": time.time(),
+            }
+            self._save()
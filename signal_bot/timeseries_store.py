@@ -0,0 +1,151 @@
+# timeseries_store.py
+import os
+import threading
+import numpy as np
+import pandas as pd
+from .utils.file_lock import file_lock
+
+DATA_DIR = 'signal_bot/data'
+TIMESERIES_DIR = os.path.join(DATA_DIR, "timeseries")
+
+# One raw little-endian array file per coin and field; timestamps are epoch milliseconds
+FIELDS = {
+    "timestamp": np.dtype("<i8"),
+    "current_price": np.dtype("<f8"),
+    "market_cap": np.dtype("<f8"),
+    "total_volume": np.dtype("<f8"),
+}
+
+
+class TimeSeriesStore:
+    """
+    Per-coin columnar time series backed by memory-mapped NumPy files.
+
+    Each coin is a directory with one headerless {field}.bin file per field.
+    Appends write to the end of the files in place (value fields first, the
+    timestamp file last), so a reader never sees a timestamp without its
+    values. Writers in every process (main.py, scheduler jobs) take a per-coin
+    file lock, so one never repairs files another is still appending to.
+    Reads map the files read-only, which makes opening a multi-year series
+    free and lets the scheduler, dashboard and backtests share the same OS
+    page cache; time-range slices are views found with a binary search on
+    the sorted timestamps.
+
+    Args:
+        root (str): Store directory.
+        fields (dict): {field: dtype}; must include "timestamp".
+    """
+
+    def __init__(self, root=TIMESERIES_DIR, fields=FIELDS):
+        self.root = root
+        self.fields = dict(fields)
+        self._lock = threading.Lock()
+
+    def path(self, coin_id, field):
+        return os.path.join(self.root, coin_id, f"{field}.bin")
+
+    def _lock_path(self, coin_id):
+        return os.path.join(self.root, coin_id, ".lock")
+
+    def _file_rows(self, coin_id, field):
+        try:
+            return os.path.getsize(self.path(coin_id, field)) // self.fields[field].itemsize
+        except FileNotFoundError:
+            return 0
+
+    def length(self, coin_id):
+        """Number of complete rows stored for a coin."""
+        return min(self._file_rows(coin_id, field) for field in self.fields)
+
+    def _repair(self, coin_id, rows):
+        # Cut every field back to the last complete row after an interrupted append; callers hold the coin's file lock
+        for field, dtype in self.fields.items():
+            path = self.path(coin_id, field)
+            if os.path.exists(path) and os.path.getsize(path) > rows * dtype.itemsize:
+                os.truncate(path, rows * dtype.itemsize)
+
+    def open(self, coin_id):
+        """
+        Maps a coin's fields read-only.
+
+        Returns:
+            dict: {field: np.memmap (or empty array)} of equal lengths.
+        """
+        rows = self.length(coin_id)
+        if rows == 0:
+            return {field: np.empty(0, dtype) for field, dtype in self.fields.items()}
+        return {
+            field: np.memmap(self.path(coin_id, field), dtype=dtype, mode="r", shape=(rows,))
+            for field, dtype in self.fields.items()
+        }
+
+    def slice(self, coin_id, start=None, end=None):
+        """
+        Returns zero-copy views of the rows with start <= timestamp <= end.
+
+        Args:
+            coin_id (str): CoinGecko coin id.
+            start (int or datetime-like, optional): Lower bound (ms or timestamp).
+            end (int or datetime-like, optional): Upper bound (ms or timestamp).
+        """
+        columns = self.open(coin_id)
+        timestamps = columns["timestamp"]
+        lo = 0 if start is None else np.searchsorted(timestamps, _to_ms(start), side="left")
+        hi = len(timestamps) if end is None else np.searchsorted(timestamps, _to_ms(end), side="right")
+        return {field: values[lo:hi] for field, values in columns.items()}
+
+    def append(self, coin_id, columns):
+        """
+        Appends rows in place, keeping only timestamps newer than the last stored one.
+
+        Args:
+            coin_id (str): CoinGecko coin id.
+            columns (dict): {"timestamp": int64 ms array, <field>: array, ...}; missing fields are NaN.
+
+        Returns:
+            int: Number of rows appended.
+        """
+        timestamps = np.asarray(columns["timestamp"], dtype=self.fields["timestamp"])
+        order = np.argsort(timestamps, kind="stable")
+        with self._lock, file_lock(self._lock_path(coin_id)):
+            rows = self.length(coin_id)
+            self._repair(coin_id, rows)
+            last = self.open(coin_id)["timestamp"][-1] if rows else None
+
+            # Strictly increasing timestamps keep searchsorted slicing valid
+            sorted_ts = timestamps[order]
+            keep = np.ones(len(sorted_ts), dtype=bool)
+            keep[1:] = sorted_ts[1:] != sorted_ts[:-1]
+            if last is not None:
+                keep &= sorted_ts > last
+            order = order[keep]
+            if len(order) == 0:
+                return 0
+
+            os.makedirs(os.path.join(self.root, coin_id), exist_ok=True)
+            for field, dtype in self.fields.items():
+                if field == "timestamp":
+                    continue
+                values = columns.get(field)
+                values = np.full(len(timestamps), np.nan) if values is None else np.asarray(values, dtype=float)
+                with open(self.path(coin_id, field), "ab") as f:
+                    f.write(values[order].astype(dtype).tobytes())
+            with open(self.path(coin_id, "timestamp"), "ab") as f:
+                f.write(timestamps[order].tobytes())
+            return len(order)
+
+    def to_frame(self, coin_id, start=None, end=None):
+        """Copies a time range into a DataFrame with a datetime 'timestamp' column."""
+        columns = self.slice(coin_id, start, end)
+        df = pd.DataFrame({field: np.array(values) for field, values in columns.items()})
+        df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
+        return df
+
+
+def _to_ms(value):
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert("UTC").tz_localize(None)
+    return ts.value // 1_000_000
@@ -0,0 +1,50 @@
+# utils/atomic_write.py
+import json
+import os
+import threading
+
+
+def _fsync_dir(path):
+    # Makes a rename inside the directory durable; not supported on every platform
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def write_atomic(path, write, mode="wb"):
+    """
+    Writes a file under a temporary name, fsyncs it and renames it into place,
+    so readers see either the previous file or the complete new one.
+
+    Args:
+        path (str): Final path.
+        write (callable): Called with the open temporary file to write the contents.
+        mode (str): "wb" for binary writers (Parquet, NumPy, CSV bytes), "w" for text ones (json.dump).
+    """
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    # Unique per process and thread, so concurrent writers of the same path never share a temporary file
+    tmp_path = f"{path}.tmp.{os.getpid()}.{threading.get_ident()}"
+    try:
+        with open(tmp_path, mode) as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _fsync_dir(directory)
+
+
+def write_json_atomic(path, obj):
+    """Atomic replacement for json.dump(obj, open(path, "w"))."""
+    write_atomic(path, lambda f: json.dump(obj, f), mode="w")
@@ -3,41 +3,264 @@ import os
 os.makedirs('signal_bot/utils', exist_ok=True)
 
 coingecko_api_content = """# utils/coingecko_api.py
+import json
+import math
+import os
+import time
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .response_cache import ResponseCache, make_key
+from .rate_limiter import TokenBucket, parse_retry_after
+from .coingecko_replay import record_response
+from .market_chart import parse_market_chart, parse_ohlc
+from .singleflight import SingleFlight
+from .resilience import CircuitBreaker, CircuitOpenError, LatencyTracker, hedged_call
+
+# Point COINGECKO_BASE_URL at utils/coingecko_replay.py to run against recorded responses offline
+BASE_URL = os.environ.get("COINGECKO_BASE_URL", "https://api.coingecko.com/api/v3")
+RECORD_DIR = os.environ.get("COINGECKO_RECORD_DIR") # When set, every live response is saved for replay
+MAX_WORKERS = 8 # Concurrent requests for multi-coin fetches
+# Connections kept per host: iter_concurrent pools, the hedge executor and history sync workers can each run MAX_WORKERS at once
+POOL_MAXSIZE = 3 * MAX_WORKERS
+PER_PAGE_MAX = 250 # CoinGecko /coins/markets page size cap
+MAX_RETRIES = 5 # Attempts after an HTTP 429 before giving up
+SIMPLE_PRICE_BATCH = 250 # Ids per /simple/price request, keeps the query string a safe length
+
+# (connect, read) deadlines in seconds per endpoint template, so a stalled connection cannot hang a job
+DEFAULT_TIMEOUT = (3.05, 15)
+TIMEOUTS = {
+    "coins/markets": (3.05, 30),
+    "coins/{id}/market_chart": (3.05, 30),
+    "coins/{id}/market_chart/range": (3.05, 20),
+    "simple/price": (3.05, 10),
+    "coins/{id}/ohlc": (3.05, 20),
+    "coins/list": (3.05, 30), # Full id list, a few MB
+}
+# Hedging fires a duplicate request once a call runs past the endpoint's p95 latency
+HEDGE_REQUESTS = os.environ.get("COINGECKO_HEDGE_REQUESTS", "0") == "1"
+HEDGE_PERCENTILE = 0.95
+
+# One session shared by every call so concurrent fetches reuse a single connection pool
+session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE)
+session.mount("https://", _adapter)
+session.mount("http://", _adapter)
+
+# Shared on-disk response cache, per-endpoint TTLs live in utils/response_cache.py
+response_cache = ResponseCache()
+
+# Calls-per-minute budget shared by every job and process, see utils/rate_limiter.py
+rate_limiter = TokenBucket()
+
+# Identical concurrent requests share one in-flight call and its parsed result, see utils/singleflight.py
+inflight = SingleFlight()
+
+# Tail-latency controls, see utils/resilience.py
+latency_tracker = LatencyTracker()
+circuit_breaker = CircuitBreaker()
+_hedge_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS) # Separate from iter_concurrent pools to avoid deadlock
+
+def _send(endpoint, path, params):
+    url = f"{BASE_URL}/{path}"
+    timeout = TIMEOUTS.get(endpoint, DEFAULT_TIMEOUT)
+    request = lambda: session.get(url, params=params, timeout=timeout)
+    hedge_delay = latency_tracker.percentile(endpoint, HEDGE_PERCENTILE) if HEDGE_REQUESTS else None
+    started = time.monotonic()
+    try:
+        if hedge_delay is None:
+            response = request()
+        else:
+            # The duplicate only goes out if the shared budget has a token free right now
+            response = hedged_call(request, hedge_delay, _hedge_executor, can_hedge=lambda: rate_limiter.acquire(timeout=0))
+    except BaseException:
+        # Timeouts and connection errors count against the upstream; anything else must still
+        # resolve a half-open trial call, or the breaker would reject every later call
+        circuit_breaker.record_failure()
+        raise
+    latency_tracker.record(endpoint, time.monotonic() - started)
+    if response.status_code >= 500:
+        circuit_breaker.record_failure()
+    else:
+        circuit_breaker.record_success()
+    return response
+
+def _fetch_text(endpoint, path, params):
+    body = response_cache.get(endpoint, path, params)
+    if body is None:
+        for attempt in range(MAX_RETRIES + 1):
+            if not circuit_breaker.allow():
+                raise CircuitOpenError(f"CoinGecko circuit open, skipping {path}")
+            rate_limiter.acquire() # Queue behind other callers instead of bursting into 429s
+            response = _send(endpoint, path, params)
+            if response.status_code == 429 and attempt < MAX_RETRIES:
+                # Pause everyone sharing the budget for as long as the API asks, then retry
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                print(f"Rate limited on {path}, retrying in {retry_after:.0f}s.")
+                rate_limiter.block_for(retry_after)
+                continue
+            break
+        response.raise_for_status() # Raise an exception for bad status codes
+        body = response.text
+        response_cache.set(endpoint, path, params, body)
+        if RECORD_DIR:
+            record_response(RECORD_DIR, path, params, body)
+    return body
 
-BASE_URL = "https://api.coingecko.com/api/v3"
+def _get_text(endpoint, params, **path_args):
+    # Returns the raw response body. endpoint is a template such as "coins/{id}/market_chart", filled in from path_args
+    path = endpoint.format(**path_args)
+    return inflight.do(("text", make_key(path, params)), _fetch_text, endpoint, path, params)
 
-def get_top_coins(limit=10):
-    url = f"{BASE_URL}/coins/markets"
+def _get_json(endpoint, params, **path_args):
+    path = endpoint.format(**path_args)
+    return inflight.do(("json", make_key(path, params)), lambda: json.loads(_get_text(endpoint, params, **path_args)))
+
+def _get_arrays(endpoint, params, parser=parse_market_chart, **path_args):
+    # Bodies decoded straight into NumPy buffers, see utils/market_chart.py
+    path = endpoint.format(**path_args)
+    return inflight.do(("arrays", make_key(path, params)), lambda: parser(_get_text(endpoint, params, **path_args)))
+
+def _get_markets_page(page, per_page):
     params = {
         "vs_currency": "usd",
         "order": "market_cap_desc",
-        "per_page": limit,
-        "page": 1,
+        "per_page": per_page,
+        "page": page,
         "sparkline": "true"
     }
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status() # Raise an exception for bad status codes
-        return response.json()
+        return _get_json("coins/markets", params)
     except requests.exceptions.RequestException as e:
-        print(f"Error fetching top coins: {e}")
+        print(f"Error fetching top coins (page {page}): {e}")
+        return None
+
+def get_top_coins(limit=10, max_workers=MAX_WORKERS):
+    if limit <= PER_PAGE_MAX:
+        return _get_markets_page(1, limit)
+
+    # Larger universes are fetched as pages 1..N in parallel and merged back into rank order
+    num_pages = math.ceil(limit / PER_PAGE_MAX)
+    pages = dict(iter_concurrent(_get_markets_page, range(1, num_pages + 1), PER_PAGE_MAX, max_workers=max_workers))
+    failed = [page for page, coins in pages.items() if coins is None]
+    if len(failed) == num_pages:
         return None
+    if failed:
+        print(f"Warning: Missing market pages {sorted(failed)}, returning partial universe.")
 
-def get_coin_history(coin_id, days="30"):
-    url = f"{BASE_URL}/coins/{coin_id}/market_chart"
+    # Coins can shift between pages while they are fetched, so dedupe by id before ordering
+    merged, seen = [], set()
+    for page in sorted(pages):
+        for coin in pages[page] or []:
+            if coin["id"] not in seen:
+                seen.add(coin["id"])
+                merged.append(coin)
+    merged.sort(key=lambda coin: (coin.get("market_cap_rank") is None, coin.get("market_cap_rank") or 0))
+    return merged[:limit]
+
+def get_coin_history(coin_id, days="30", as_arrays=False):
+    # as_arrays=True decodes the raw body into {series: (int64 timestamps, float64 values)} via utils/market_chart.py
     params = {"vs_currency": "usd", "days": days} # Removed 'interval': 'hourly'
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status() # Raise an exception for bad status codes
-        data = response.json()
-        return data
+        if as_arrays:
+            return _get_arrays("coins/{id}/market_chart", params, id=coin_id)
+        return _get_json("coins/{id}/market_chart", params, id=coin_id)
     except requests.exceptions.RequestException as e:
         print(f"Error fetching historical data for {coin_id}: {e}")
-        if 'response' in locals() and response is not None:
-             print(f"Response status code: {response.status_code}")
-             print(f"Response text: {response.text}")
+        if e.response is not None:
+             print(f"Response status code: {e.response.status_code}")
+             print(f"Response text: {e.response.text}")
         return None
+
+def get_coin_history_range(coin_id, from_ts, to_ts, as_arrays=False):
+    # from_ts/to_ts are UNIX seconds, CoinGecko picks granularity from the span (5-minute under a day, hourly up to 90 days)
+    params = {"vs_currency": "usd", "from": int(from_ts), "to": int(to_ts)}
+    try:
+        if as_arrays:
+            return _get_arrays("coins/{id}/market_chart/range", params, id=coin_id)
+        return _get_json("coins/{id}/market_chart/range", params, id=coin_id)
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching historical range for {coin_id}: {e}")
+        if e.response is not None:
+             print(f"Response status code: {e.response.status_code}")
+             print(f"Response text: {e.response.text}")
+        return None
+
+def get_coin_ohlc(coin_id, days="30", as_arrays=False):
+    # Candles are [timestamp_ms, open, high, low, close]; CoinGecko sets candle width from days (30m up to 2d, 4h up to 30d, 4d beyond)
+    params = {"vs_currency": "usd", "days": days}
+    try:
+        if as_arrays:
+            return _get_arrays("coins/{id}/ohlc", params, parser=parse_ohlc, id=coin_id)
+        return _get_json("coins/{id}/ohlc", params, id=coin_id)
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching OHLC data for {coin_id}: {e}")
+        if e.response is not None:
+             print(f"Response status code: {e.response.status_code}")
+             print(f"Response text: {e.response.text}")
+        return None
+
+def get_coins_list():
+    # Every coin CoinGecko knows as [{"id", "symbol", "name"}], changes rarely and is cached for a day
+    try:
+        return _get_json("coins/list", {})
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching coin list: {e}")
+        return None
+
+def _get_simple_price_batch(ids):
+    params = {
+        "ids": ids,
+        "vs_currencies": "usd",
+        "include_24hr_change": "true",
+        "include_24hr_vol": "true",
+        "include_last_updated_at": "true"
+    }
+    try:
+        return _get_json("simple/price", params)
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching simple prices: {e}")
+        return None
+
+def get_simple_prices(coin_ids, batch_size=SIMPLE_PRICE_BATCH, max_workers=MAX_WORKERS):
+    # Lightweight price refresh: comma-joined id batches, fetched in parallel and merged into {coin_id: quote}
+    coin_ids = list(coin_ids)
+    batches = [",".join(coin_ids[i:i + batch_size]) for i in range(0, len(coin_ids), batch_size)]
+    prices, failed = {}, 0
+    for _, batch_prices in iter_concurrent(_get_simple_price_batch, batches, max_workers=max_workers):
+        if batch_prices is None:
+            failed += 1
+        else:
+            prices.update(batch_prices)
+    if batches and failed == len(batches):
+        return None
+    if failed:
+        print(f"Warning: {failed}/{len(batches)} simple price batches failed, returning partial prices.")
+    return prices
+
+def iter_concurrent(fetch, keys, *args, max_workers=MAX_WORKERS):
+    # Runs fetch(key, *args) on a bounded pool and yields (key, result) as each finishes;
+    # shared by every multi-coin fetch here and by history_sync.iter_coin_history_syncs
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = {executor.submit(fetch, key, *args): key for key in keys}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+    finally:
+        # Drop queued work if the caller stops iterating early
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def iter_coin_histories(coin_ids, days="30", max_workers=MAX_WORKERS, as_arrays=False):
+    # Yields (coin_id, history) in completion order, history is None if that coin failed
+    return iter_concurrent(get_coin_history, coin_ids, days, as_arrays, max_workers=max_workers)
+
+def get_coin_histories(coin_ids, days="30", max_workers=MAX_WORKERS, as_arrays=False):
+    # Blocking variant of iter_coin_histories, returns {coin_id: history}
+    return dict(iter_coin_histories(coin_ids, days=days, max_workers=max_workers, as_arrays=as_arrays))
+
+def iter_coin_ohlc(coin_ids, days="30", max_workers=MAX_WORKERS, as_arrays=False):
+    # Yields (coin_id, candles) in completion order, candles is None if that coin failed
+    return iter_concurrent(get_coin_ohlc, coin_ids, days, as_arrays, max_workers=max_workers)
 """
 
 with open('signal_bot/utils/coingecko_api.py', 'w') as f:
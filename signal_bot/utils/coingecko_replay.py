@@ -0,0 +1,159 @@
+# utils/coingecko_replay.py
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+from .response_cache import make_key
+from .atomic_write import write_json_atomic
+
+DATA_DIR = 'signal_bot/data'
+RECORD_DIR = os.path.join(DATA_DIR, "coingecko_recordings")
+
+
+def _recording_key(path, params):
+    # Query strings arrive as text on replay, so params are keyed by their string form
+    return make_key(path.strip("/"), {k: str(v) for k, v in (params or {}).items()})
+
+
+def record_response(record_dir, path, params, body):
+    """
+    Saves one CoinGecko response so the replay server can serve it later.
+
+    Args:
+        record_dir (str): Directory holding the recordings.
+        path (str): Request path relative to BASE_URL, e.g. "coins/markets".
+        params (dict): Query params of the request.
+        body (str): Raw response body.
+    """
+    os.makedirs(record_dir, exist_ok=True)
+    recording = {"path": path.strip("/"), "params": params, "recorded_at": time.time(), "body": body}
+    target = os.path.join(record_dir, f"{_recording_key(path, params)}.json")
+    write_json_atomic(target, recording)
+
+
+def load_recordings(record_dir):
+    """
+    Loads recordings into lookup tables.
+
+    Returns:
+        tuple: ({key: body} for exact matches, {path: body} with the newest body per path).
+    """
+    exact, by_path, newest = {}, {}, {}
+    for name in os.listdir(record_dir):
+        if not name.endswith(".json"):
+            continue
+        with open(os.path.join(record_dir, name)) as f:
+            recording = json.load(f)
+        exact[name[:-len(".json")]] = recording["body"]
+        if recording["recorded_at"] >= newest.get(recording["path"], 0):
+            newest[recording["path"]] = recording["recorded_at"]
+            by_path[recording["path"]] = recording["body"]
+    return exact, by_path
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    """Serves recorded responses with the latency and failure profile configured on the server."""
+
+    def log_message(self, format, *args):
+        pass # Keep benchmark output quiet
+
+    def do_GET(self):
+        server = self.server
+        url = urlsplit(self.path)
+        path = url.path.strip("/")
+        if path.startswith("api/v3/"):
+            path = path[len("api/v3/"):]
+        params = dict(parse_qsl(url.query))
+
+        delay = server.latency + random.uniform(-server.jitter, server.jitter)
+        time.sleep(max(0.0, delay))
+
+        with server.stats_lock:
+            server.stats["requests"] += 1
+        if server.rate_429 > 0 and random.random() < server.rate_429:
+            with server.stats_lock:
+                server.stats["throttled"] += 1
+            self._send(429, b'{"status": {"error_code": 429, "error_message": "Throttled (replay)"}}',
+                       {"Retry-After": str(server.retry_after)})
+            return
+
+        body = server.exact.get(_recording_key(path, params))
+        if body is None:
+            # Time-windowed params (e.g. market_chart/range from/to) never repeat exactly
+            body = server.by_path.get(path)
+        if body is None:
+            with server.stats_lock:
+                server.stats["missing"] += 1
+            self._send(404, b'{"error": "no recording for this request"}')
+            return
+        self._send(200, body.encode("utf-8"))
+
+    def _send(self, status, payload, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def make_replay_server(record_dir=RECORD_DIR, host="127.0.0.1", port=8000, latency_ms=0,
+                       jitter_ms=0, rate_429=0.0, retry_after=1):
+    """
+    Builds a local stand-in for the CoinGecko API that replays recorded responses.
+
+    Point the client at it with COINGECKO_BASE_URL=http://<host>:<port>.
+
+    Args:
+        record_dir (str): Directory written by record_response.
+        host (str): Interface to bind.
+        port (int): Port to listen on (0 picks a free one).
+        latency_ms (float): Base delay added to every response.
+        jitter_ms (float): Uniform +/- jitter around latency_ms.
+        rate_429 (float): Fraction of requests answered with HTTP 429.
+        retry_after (int): Retry-After seconds sent with injected 429s.
+
+    Returns:
+        ThreadingHTTPServer: Server ready for serve_forever(); its stats dict counts requests.
+    """
+    server = ThreadingHTTPServer((host, port), ReplayHandler)
+    server.exact, server.by_path = load_recordings(record_dir)
+    server.latency = latency_ms / 1000.0
+    server.jitter = jitter_ms / 1000.0
+    server.rate_429 = rate_429
+    server.retry_after = retry_after
+    server.stats = {"requests": 0, "throttled": 0, "missing": 0}
+    server.stats_lock = threading.Lock()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded CoinGecko responses for offline benchmarking.")
+    parser.add_argument("--dir", default=RECORD_DIR, help="Recording directory (set COINGECKO_RECORD_DIR to fill it).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of requests to throttle.")
+    parser.add_argument("--retry-after", type=int, default=1)
+    args = parser.parse_args()
+
+    server = make_replay_server(args.dir, args.host, args.port, args.latency_ms,
+                                args.jitter_ms, args.rate_429, args.retry_after)
+    print(f"Replaying {len(server.exact)} recordings from {args.dir} at http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"Replay stats: {server.stats}")
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+# utils/file_lock.py
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError: # Windows has no fcntl, the lock then only holds within one process (callers keep a thread lock too)
+    fcntl = None
+
+
+@contextmanager
+def file_lock(path):
+    """
+    Holds an exclusive cross-process lock on path (created if missing) for the
+    duration of the block, so main.py, the scheduler and the dashboard can
+    serialise work on the same files. Locks are per open file, so threads of
+    one process exclude each other as well.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, "a+") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
@@ -0,0 +1,97 @@
+# utils/key_index.py
+import os
+import threading
+import numpy as np
+from .atomic_write import write_atomic
+from .file_lock import file_lock
+
+KEY_DTYPE = np.dtype("<i8")
+
+
+class KeyIndex:
+    """
+    Persistent (id, timestamp) key set for append-only logs.
+
+    Every id has a sorted file of int64 millisecond timestamps. Logs are
+    written in time order, so a key newer than the id's last stored timestamp
+    is new without looking further and is appended to the end of the file;
+    only older keys fall back to a binary search of the memory-mapped file.
+    The per-tick cost therefore depends on the batch, not on how large the
+    log has grown.
+
+    filter_new and add are separate steps; writers in different processes
+    hold lock() across filter, log append and add so they never both log the
+    same key.
+
+    Args:
+        root (str): Directory holding one {id}.keys file per id.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def _path(self, key_id):
+        return os.path.join(self.root, f"{key_id}.keys")
+
+    def _keys(self, key_id):
+        path = self._path(key_id)
+        rows = os.path.getsize(path) // KEY_DTYPE.itemsize if os.path.exists(path) else 0
+        if rows == 0:
+            return np.empty(0, KEY_DTYPE)
+        return np.memmap(path, dtype=KEY_DTYPE, mode="r", shape=(rows,))
+
+    def lock(self):
+        """Cross-process lock on the index (and the log it guards), held for a whole filter/append/add sequence."""
+        return file_lock(os.path.join(self.root, ".lock"))
+
+    def exists(self):
+        return os.path.isdir(self.root) and any(name.endswith(".keys") for name in os.listdir(self.root))
+
+    def filter_new(self, ids, timestamps):
+        """
+        Returns a boolean mask of the keys that are not in the index yet.
+        Repeated keys within the batch count once (the first occurrence).
+
+        Args:
+            ids (array-like): Key ids (e.g. coin ids).
+            timestamps (array-like): int64 millisecond timestamps, same length as ids.
+        """
+        ids = np.asarray(ids, dtype=object).astype(str)
+        timestamps = np.asarray(timestamps, dtype=KEY_DTYPE)
+        mask = np.zeros(len(ids), dtype=bool)
+        for key_id in np.unique(ids):
+            rows = np.flatnonzero(ids == key_id)
+            batch = timestamps[rows]
+            _, first = np.unique(batch, return_index=True)
+            candidates = rows[np.sort(first)]
+            stored = self._keys(key_id)
+            if len(stored):
+                ts = timestamps[candidates]
+                older = ts <= stored[-1]
+                if older.any():
+                    # Out-of-order keys need the exact check
+                    positions = np.searchsorted(stored, ts[older])
+                    seen = np.zeros(len(ts), dtype=bool)
+                    seen[older] = stored[np.minimum(positions, len(stored) - 1)] == ts[older]
+                    candidates = candidates[~seen]
+            mask[candidates] = True
+        return mask
+
+    def add(self, ids, timestamps):
+        """Appends keys to the index; callers pass keys already filtered by filter_new."""
+        ids = np.asarray(ids, dtype=object).astype(str)
+        timestamps = np.asarray(timestamps, dtype=KEY_DTYPE)
+        with self._lock:
+            os.makedirs(self.root, exist_ok=True)
+            for key_id in np.unique(ids):
+                batch = np.sort(timestamps[ids == key_id])
+                stored = self._keys(key_id)
+                if len(stored) and batch[0] <= stored[-1]:
+                    # Rare late key: rewrite this id's file so it stays sorted
+                    merged = np.union1d(stored, batch).astype(KEY_DTYPE)
+                    del stored
+                    write_atomic(self._path(key_id), lambda f: f.write(merged.tobytes()))
+                    continue
+                with open(self._path(key_id), "ab") as f:
+                    f.write(batch.tobytes())
@@ -0,0 +1,76 @@
+# utils/market_chart.py
+import re
+import numpy as np
+
+SERIES_KEYS = ("prices", "market_caps", "total_volumes")
+OHLC_COLUMNS = ("open", "high", "low", "close")
+
+# Brackets become whitespace so "[[t,v],[t,v]]" reads as one flat comma-separated run of numbers
+_FLATTEN = str.maketrans("[]", "  ")
+# Values never contain brackets, so the first "]" closing another "]" ends the series, however the body is spaced
+_SERIES_END = re.compile(r"]\s*]")
+_EMPTY_SERIES = re.compile(r"\s*]")
+
+
+def _series_text(body, key):
+    # Returns the text between the outer brackets of body[key], or "" when the series is empty/missing
+    start = body.find(f'"{key}"')
+    if start < 0:
+        return ""
+    start = body.index("[", start) + 1
+    if _EMPTY_SERIES.match(body, start):
+        return ""
+    end = _SERIES_END.search(body, start)
+    if end is None:
+        raise ValueError(f"Unterminated '{key}' series in market_chart response")
+    return body[start:end.start() + 1]
+
+
+def parse_series(body, key):
+    """
+    Decodes one [[timestamp_ms, value], ...] series of a market_chart response
+    straight from the raw JSON text into NumPy buffers.
+
+    Args:
+        body (str): Raw market_chart (or market_chart/range) response body.
+        key (str): One of "prices", "market_caps", "total_volumes".
+
+    Returns:
+        tuple: (timestamps int64 ms, values float64), both C-contiguous. JSON nulls become NaN.
+    """
+    text = _series_text(body, key)
+    if not text:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    flat = np.fromstring(text.translate(_FLATTEN).replace("null", "nan"), dtype=np.float64, sep=",")
+    pairs = flat.reshape(-1, 2)
+    return pairs[:, 0].astype(np.int64), np.ascontiguousarray(pairs[:, 1])
+
+
+def parse_market_chart(body):
+    """
+    Decodes all three series of a market_chart response body.
+
+    Returns:
+        dict: {"prices" | "market_caps" | "total_volumes": (timestamps, values)}.
+    """
+    return {key: parse_series(body, key) for key in SERIES_KEYS}
+
+
+def parse_ohlc(body):
+    """
+    Decodes a /coins/{id}/ohlc response ([[timestamp_ms, open, high, low, close], ...])
+    straight from the raw JSON text into NumPy buffers.
+
+    Returns:
+        dict: {"timestamp": int64 ms, "open" | "high" | "low" | "close": float64}, all C-contiguous.
+    """
+    text = body.translate(_FLATTEN).strip()
+    if text:
+        flat = np.fromstring(text.replace("null", "nan"), dtype=np.float64, sep=",")
+    else:
+        flat = np.empty(0, dtype=np.float64)
+    rows = flat.reshape(-1, 1 + len(OHLC_COLUMNS))
+    candles = {"timestamp": rows[:, 0].astype(np.int64)}
+    for i, column in enumerate(OHLC_COLUMNS, start=1):
+        candles[column] = np.ascontiguousarray(rows[:, i])
+    return candles
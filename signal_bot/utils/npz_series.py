@@ -0,0 +1,37 @@
+# utils/npz_series.py
+import os
+import numpy as np
+from .atomic_write import write_atomic
+
+
+def load_series(path):
+    """Loads a timestamp-keyed .npz series into {column: array}, or None if it does not exist."""
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as series:
+        return {name: series[name] for name in series.files}
+
+
+def merge_series(path, columns):
+    """
+    Merges new rows into a timestamp-keyed .npz series and swaps the file in atomically.
+
+    Rows are deduped by timestamp with the newest observation winning, and the
+    result is kept sorted by timestamp.
+
+    Args:
+        path (str): Target .npz file.
+        columns (dict): {"timestamp": int64 ms array, <column>: array, ...} of equal lengths.
+
+    Returns:
+        int: Number of rows in the merged series.
+    """
+    existing = load_series(path)
+    if existing is not None:
+        columns = {name: np.concatenate([existing[name], values]) for name, values in columns.items()}
+    # np.unique keeps the first occurrence, so search the reversed arrays to keep the newest
+    timestamps, first_in_reversed = np.unique(columns["timestamp"][::-1], return_index=True)
+    merged = {name: values[::-1][first_in_reversed] for name, values in columns.items() if name != "timestamp"}
+
+    write_atomic(path, lambda f: np.savez(f, timestamp=timestamps, **merged))
+    return len(timestamps)
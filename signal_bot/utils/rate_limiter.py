@@ -0,0 +1,121 @@
+# utils/rate_limiter.py
+import json
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+try:
+    import fcntl
+except ImportError: # Windows has no fcntl, the bucket is then only shared within one process
+    fcntl = None
+
+DATA_DIR = 'signal_bot/data'
+STATE_PATH = os.path.join(DATA_DIR, "coingecko_rate_limit.json")
+
+# CoinGecko's public API allows roughly 30 calls per minute, override per deployment
+CALLS_PER_MINUTE = float(os.environ.get("COINGECKO_CALLS_PER_MINUTE", "30"))
+DEFAULT_RETRY_AFTER = 60 # Seconds to pause after a 429 that carries no Retry-After header
+
+
+def parse_retry_after(value, default=DEFAULT_RETRY_AFTER):
+    """Converts a Retry-After header (seconds or HTTP date) into seconds to wait."""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+
+class TokenBucket:
+    """
+    Token-bucket limiter whose state lives in a small JSON file guarded by an
+    exclusive file lock, so every process and scheduler job spends one shared
+    calls-per-minute budget.
+
+    Args:
+        calls_per_minute (float): Sustained request budget.
+        burst (int, optional): Bucket capacity. Defaults to one call so requests are evenly spaced.
+        state_path (str): JSON file holding the shared bucket state.
+    """
+
+    def __init__(self, calls_per_minute=CALLS_PER_MINUTE, burst=1, state_path=STATE_PATH):
+        self.rate = calls_per_minute / 60.0
+        self.capacity = float(burst)
+        self.state_path = state_path
+        self._lock = threading.Lock()
+
+    def _read_state(self, f):
+        f.seek(0)
+        try:
+            return json.loads(f.read() or "{}")
+        except json.JSONDecodeError:
+            return {}
+
+    def _write_state(self, f, state):
+        f.seek(0)
+        f.truncate()
+        f.write(json.dumps(state))
+        f.flush()
+
+    def _update(self, fn):
+        # Runs fn(state, now) under both the thread lock and the cross-process file lock
+        os.makedirs(os.path.dirname(self.state_path) or '.', exist_ok=True)
+        with self._lock, open(self.state_path, "a+") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                state = self._read_state(f)
+                result = fn(state, time.time())
+                self._write_state(f, state)
+                return result
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _try_take(self, state, now):
+        # Returns 0 if a token was taken, otherwise the seconds until one is available
+        tokens = state.get("tokens", self.capacity)
+        updated = state.get("updated", now)
+        tokens = min(self.capacity, tokens + max(0.0, now - updated) * self.rate)
+        state["updated"] = now
+        blocked_until = state.get("blocked_until", 0)
+        if blocked_until > now:
+            state["tokens"] = tokens
+            return blocked_until - now
+        if tokens >= 1:
+            state["tokens"] = tokens - 1
+            return 0
+        state["tokens"] = tokens
+        return (1 - tokens) / self.rate
+
+    def acquire(self, timeout=None):
+        """
+        Blocks until a call may be made, queueing behind other callers.
+
+        Args:
+            timeout (float, optional): Give up after this many seconds.
+
+        Returns:
+            bool: True once a token was taken, False if the timeout expired first.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            wait = self._update(self._try_take)
+            if wait <= 0:
+                return True
+            if deadline is not None and time.time() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def block_for(self, seconds):
+        """Pauses all callers, in every process, for the given number of seconds (e.g. Retry-After)."""
+        def _block(state, now):
+            state["blocked_until"] = max(state.get("blocked_until", 0), now + seconds)
+            state["tokens"] = 0
+        self._update(_block)
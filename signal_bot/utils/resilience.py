@@ -0,0 +1,112 @@
+# utils/resilience.py
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+import requests
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of calling the API while the circuit breaker is open."""
+
+
+class LatencyTracker:
+    """
+    Keeps a rolling window of response times per endpoint to derive hedge delays.
+
+    Args:
+        window (int): Samples kept per endpoint.
+        min_samples (int): Samples needed before a percentile is reported.
+    """
+
+    def __init__(self, window=200, min_samples=20):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, seconds):
+        with self._lock:
+            self._samples.setdefault(endpoint, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, endpoint, q=0.95):
+        """Returns the q-th latency percentile in seconds, or None until min_samples are recorded."""
+        with self._lock:
+            samples = sorted(self._samples.get(endpoint, ()))
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+class CircuitBreaker:
+    """
+    Short-circuits calls while the upstream is degraded.
+
+    After failure_threshold consecutive failures the breaker opens and rejects
+    calls for reset_timeout seconds, then lets a single trial call through
+    (half-open); its outcome closes or re-opens the breaker.
+
+    Args:
+        failure_threshold (int): Consecutive failures that open the breaker.
+        reset_timeout (float): Seconds to stay open before a trial call.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Returns True if a call may go out now."""
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open" # Let exactly one trial call through
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+def hedged_call(fn, hedge_delay, executor, can_hedge=lambda: True):
+    """
+    Runs fn and, if it has not answered within hedge_delay seconds, fires a
+    duplicate and returns whichever finishes first.
+
+    Args:
+        fn (callable): Zero-argument request function.
+        hedge_delay (float): Seconds to wait before hedging (e.g. the endpoint's p95 latency).
+        executor (Executor): Pool the attempts run on; must not be the caller's own pool.
+        can_hedge (callable): Checked before hedging, e.g. to only hedge when rate budget is free.
+
+    Returns:
+        The first successful result. If every attempt fails, the first error is raised.
+    """
+    pending = {executor.submit(fn)}
+    done, pending = wait(pending, timeout=hedge_delay)
+    if not done and can_hedge():
+        pending.add(executor.submit(fn))
+
+    first_error = None
+    while True:
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            first_error = first_error or future.exception()
+        if not pending:
+            raise first_error
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
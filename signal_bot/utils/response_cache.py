@@ -0,0 +1,137 @@
+# utils/response_cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DATA_DIR = 'signal_bot/data'
+CACHE_PATH = os.path.join(DATA_DIR, "coingecko_cache.sqlite")
+
+# Seconds a response stays fresh, keyed by endpoint template. 0 disables caching for that endpoint.
+DEFAULT_TTLS = {
+    "coins/markets": 300,
+    "coins/{id}/market_chart": 900,
+    "coins/{id}/market_chart/range": 0, # 'to' moves every call, so these never repeat
+    "coins/{id}/ohlc": 900,
+    "simple/price": 30, # Polled every minute, so only repeats within a tick are served from cache
+    "coins/list": 24 * 60 * 60,
+}
+DEFAULT_TTL = 300
+MAX_CACHE_BYTES = 64 * 1024 * 1024 # Least recently used entries are evicted above this size
+
+
+def make_key(path, params):
+    """Builds a stable cache key from a request path and its query params."""
+    canonical = path + "?" + json.dumps(params or {}, sort_keys=True, default=str)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    On-disk TTL cache for raw API response bodies, backed by SQLite so it is
+    shared by every process that runs the bot (main, scheduler jobs, dashboard).
+
+    Args:
+        path (str): SQLite file holding the cache.
+        ttls (dict, optional): Per-endpoint TTLs in seconds, merged over DEFAULT_TTLS.
+        max_bytes (int): Total body size kept before LRU eviction kicks in.
+    """
+
+    def __init__(self, path=CACHE_PATH, ttls=None, max_bytes=MAX_CACHE_BYTES):
+        self.path = path
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, endpoint TEXT, body TEXT, size INTEGER, "
+                "expires_at REAL, last_access REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access)")
+            self._conn.commit()
+        return self._conn
+
+    def ttl_for(self, endpoint):
+        return self.ttls.get(endpoint, DEFAULT_TTL)
+
+    def get(self, endpoint, path, params):
+        """Returns the cached body for a request, or None if missing or expired."""
+        if self.ttl_for(endpoint) <= 0:
+            return None
+        key = make_key(path, params)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT body, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or row[1] <= now:
+                if row is not None:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    conn.commit()
+                self.misses += 1
+                return None
+            conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def set(self, endpoint, path, params, body):
+        """Stores a response body and evicts least recently used entries over max_bytes."""
+        ttl = self.ttl_for(endpoint)
+        if ttl <= 0:
+            return
+        now = time.time()
+        size = len(body.encode("utf-8"))
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, endpoint, body, size, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (make_key(path, params), endpoint, body, size, now + ttl, now),
+            )
+            self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Expired entries go first, then the least recently used ones
+        conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_access").fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+
+    def stats(self):
+        """Returns hit/miss/eviction counters for this process plus current cache size."""
+        with self._lock:
+            entries, size = self._connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+        }
@@ -0,0 +1,53 @@
+# utils/singleflight.py
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key: the first caller runs the
+    function, every caller that arrives while it is still running waits for and
+    receives the same result (or exception). Results are shared objects, so
+    callers must treat them as read-only.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executed = 0
+        self.shared = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Runs fn(*args, **kwargs) unless a call with the same key is already in flight.
+
+        Args:
+            key (hashable): Identity of the call, e.g. request path and params.
+            fn (callable): Function producing the result.
+
+        Returns:
+            The result of the single in-flight call for key.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+                self.executed += 1
+            else:
+                self.shared += 1
+        if not leader:
+            return call.result()
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            # Later callers start a fresh request instead of reusing a stale result
+            with self._lock:
+                del self._calls[key]
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from signal_bot.candle_store import latest_atr, load_candles, save_candles
+from signal_bot.utils.npz_series import load_series, merge_series
+
+HALF_HOUR_MS = 30 * 60 * 1000
+
+
+def candles(start, count, close_offset=0.0):
+    timestamps = (start + np.arange(count, dtype=np.int64)) * HALF_HOUR_MS
+    close = 100.0 + np.arange(count) + close_offset
+    return {"timestamp": timestamps, "open": close - 0.5, "high": close + 1.0, "low": close - 1.0, "close": close}
+
+
+def test_merge_dedupes_by_timestamp_keeping_the_newest(tmp_path):
+    path = str(tmp_path / "bitcoin.npz")
+    merge_series(path, candles(0, 4))
+    assert merge_series(path, candles(2, 4, close_offset=0.25)) == 6
+
+    series = load_series(path)
+    assert series["timestamp"].tolist() == [i * HALF_HOUR_MS for i in range(6)]
+    assert series["close"].tolist() == [100.0, 101.0, 100.25, 101.25, 102.25, 103.25]
+    assert load_series(str(tmp_path / "missing.npz")) is None
+
+
+def test_candles_load_in_compute_indicators_shape(tmp_path):
+    save_candles("bitcoin", candles(0, 3), str(tmp_path))
+    df = load_candles("bitcoin", str(tmp_path))
+
+    assert list(df.columns) == ["id", "timestamp", "open", "high", "low", "close", "current_price"]
+    assert (df["current_price"] == df["close"]).all() and (df["id"] == "bitcoin").all()
+    assert load_candles("ethereum", str(tmp_path)).empty
+
+
+def test_latest_atr_uses_the_candles_true_range(tmp_path):
+    save_candles("bitcoin", candles(0, 60), str(tmp_path))
+    save_candles("dogecoin", candles(0, 2), str(tmp_path)) # Too few candles for an ATR
+
+    atr = latest_atr(["bitcoin", "dogecoin", "ethereum"], str(tmp_path))
+    assert atr["id"].tolist() == ["bitcoin"]
+    assert atr["atr"].iloc[0] == pytest.approx(2.0) # high - low, and |high - previous close|, are both 2
@@ -0,0 +1,60 @@
+import io
+
+import pandas as pd
+
+from signal_bot.coin_metadata import load_coin_dimension, update_coin_dimension
+
+API_ROWS = [
+    {"id": "bitcoin", "symbol": "btc", "name": "Bitcoin", "image": "https://example.com/btc.png",
+     "ath": 69045, "ath_date": "2021-11-10T14:24:11.849Z", "atl": 67.81, "atl_date": "2013-07-06T00:00:00.000Z",
+     "max_supply": 21000000.0, "roi": None, "current_price": 65000.0},
+    {"id": "ethereum", "symbol": "eth", "name": "Ethereum", "image": "https://example.com/eth.png",
+     "ath": 4878.26, "ath_date": "2021-11-10T14:24:19.604Z", "atl": 0.432979, "atl_date": "2015-10-20T00:00:00.000Z",
+     "max_supply": None, "roi": {"times": 45.1, "currency": "btc", "percentage": 4510.0}, "current_price": 3200.0},
+]
+
+
+def csv_round_trip(df):
+    # The legacy snapshot CSV: whatever to_csv made of the API frame, parsed back with default dtypes
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False)
+    buffer.seek(0)
+    return pd.read_csv(buffer)
+
+
+def test_unchanged_rows_are_not_rewritten(tmp_path):
+    path = str(tmp_path / "coin_dim.csv")
+    assert update_coin_dimension(pd.DataFrame(API_ROWS), path) == 2
+    assert update_coin_dimension(pd.DataFrame(API_ROWS), path) == 0
+
+
+def test_rows_parsed_back_from_csv_hash_like_api_rows(tmp_path):
+    path = str(tmp_path / "coin_dim.csv")
+    update_coin_dimension(pd.DataFrame(API_ROWS), path)
+
+    assert update_coin_dimension(csv_round_trip(pd.DataFrame(API_ROWS)), path) == 0
+    assert update_coin_dimension(csv_round_trip(load_coin_dimension(path)), path) == 0
+
+
+def test_new_ath_updates_only_that_coin(tmp_path):
+    path = str(tmp_path / "coin_dim.csv")
+    update_coin_dimension(pd.DataFrame(API_ROWS), path)
+    rows = pd.DataFrame(API_ROWS)
+    rows.loc[rows["id"] == "bitcoin", ["ath", "ath_date"]] = [73738.0, "2024-03-14T07:10:36.635Z"]
+
+    assert update_coin_dimension(rows, path) == 1
+    dim = load_coin_dimension(path).set_index("id")
+    assert dim.loc["bitcoin", "ath"] == 73738.0
+    assert len(dim) == 2
+
+
+def test_cleaned_legacy_rows_hash_like_api_rows(tmp_path):
+    path = str(tmp_path / "coin_dim.csv")
+    update_coin_dimension(pd.DataFrame(API_ROWS), path)
+
+    # Legacy snapshots written after clean_and_normalize: float32 prices, epoch-ms dates
+    cleaned = pd.DataFrame(API_ROWS)
+    cleaned[["ath", "atl"]] = cleaned[["ath", "atl"]].astype("float32")
+    for col in ("ath_date", "atl_date"):
+        cleaned[col] = pd.to_datetime(cleaned[col], utc=True).dt.as_unit("ms").astype("int64")
+    assert update_coin_dimension(csv_round_trip(cleaned), path) == 0
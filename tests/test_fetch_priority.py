@@ -0,0 +1,29 @@
+from signal_bot.fetch_priority import PriorityFetchQueue, score_coins
+
+
+def make_queue(tmp_path, **kwargs):
+    return PriorityFetchQueue(state_path=str(tmp_path / "state.json"), **kwargs)
+
+
+def test_cold_queue_returns_top_ranked_coins_first(tmp_path):
+    universe = [f"coin-{rank:04d}" for rank in range(250)]
+    queue = make_queue(tmp_path, budget=25)
+    queue.update_scores(score_coins(universe))
+
+    assert queue.next_batch(now=1_000.0) == universe[:25]
+
+
+def test_hotter_coins_go_ahead_of_higher_ranked_ones(tmp_path):
+    queue = make_queue(tmp_path, budget=2)
+    queue.update_scores({"bitcoin": 0.0, "ethereum": 0.0, "pepe": 4.0})
+
+    assert queue.next_batch(now=1_000.0) == ["pepe", "bitcoin"]
+
+
+def test_refreshed_coins_wait_for_their_interval(tmp_path):
+    queue = make_queue(tmp_path, budget=10, min_refresh=60, max_refresh=600)
+    queue.update_scores({"bitcoin": 0.0, "ethereum": 0.0})
+    queue.mark_refreshed(["bitcoin"], now=1_000.0)
+
+    assert queue.next_batch(now=1_100.0) == ["ethereum"]
+    assert make_queue(tmp_path).last_refreshed == {"bitcoin": 1_000.0}
@@ -0,0 +1,63 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from signal_bot import history_sync
+from signal_bot.history_sync import history_path, load_sync_state, sync_coin_history
+from signal_bot.timeseries_store import TimeSeriesStore
+
+HOUR_MS = 3_600_000
+
+
+def chart(start_ms, count, step_ms):
+    timestamps = start_ms + step_ms * np.arange(count, dtype=np.int64)
+    prices = 100.0 + np.arange(count, dtype=np.float64)
+    return {"prices": (timestamps, prices), "market_caps": (timestamps, prices * 1e7),
+            "total_volumes": (timestamps, np.full(count, 5e8))}
+
+
+@pytest.fixture
+def sync(tmp_path, monkeypatch):
+    monkeypatch.delenv("SIGNAL_BOT_SQLITE", raising=False)
+    responses = []
+    monkeypatch.setattr(history_sync, "get_coin_history_range", lambda coin_id, start, end, as_arrays: responses.pop(0))
+    store = TimeSeriesStore(str(tmp_path / "timeseries"))
+    state_path = str(tmp_path / "state.json")
+
+    def run(response):
+        responses.append(response)
+        return sync_coin_history("bitcoin", data_dir=str(tmp_path), state_path=state_path, store=store)
+    return run, store, state_path
+
+
+def test_backfill_then_append_only_newer_hourly_points(tmp_path, sync):
+    run, store, state_path = sync
+    assert len(run(chart(0, 24, HOUR_MS))) == 24
+
+    # An incremental range answer at 5-minute granularity overlapping the last stored hour
+    new_rows = run(chart(23 * HOUR_MS, 36, 5 * 60 * 1000))
+    assert pd.to_datetime(new_rows["timestamp"]).tolist() == [pd.Timestamp(24 * HOUR_MS, unit="ms"), pd.Timestamp(25 * HOUR_MS, unit="ms")]
+
+    history = pd.read_csv(history_path("bitcoin", str(tmp_path)))
+    assert len(history) == 26 and not history["timestamp"].duplicated().any()
+    assert store.length("bitcoin") == 26
+    assert load_sync_state(state_path) == {"bitcoin": 25 * HOUR_MS}
+
+
+def test_failed_fetch_leaves_state_alone(tmp_path, sync):
+    run, store, state_path = sync
+    run(chart(0, 3, HOUR_MS))
+
+    assert run(None) is None
+    assert load_sync_state(state_path) == {"bitcoin": 2 * HOUR_MS}
+    assert run(chart(0, 3, HOUR_MS)).empty # Nothing newer than the high-water mark
+
+
+def test_locks_stay_out_of_the_data_directory(tmp_path, sync):
+    run, _, _ = sync
+    run(chart(0, 3, HOUR_MS))
+
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".lock")]
+    assert os.listdir(tmp_path / "locks")
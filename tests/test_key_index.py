@@ -0,0 +1,30 @@
+import numpy as np
+
+from signal_bot.utils.key_index import KeyIndex
+
+
+def test_filters_stored_and_repeated_keys(tmp_path):
+    index = KeyIndex(str(tmp_path / "index"))
+    assert not index.exists()
+    index.add(["bitcoin", "bitcoin", "ethereum"], [1_000, 2_000, 1_000])
+
+    mask = index.filter_new(
+        ["bitcoin", "bitcoin", "bitcoin", "bitcoin", "ethereum", "solana"],
+        [2_000, 3_000, 3_000, 1_500, 1_000, 1_000],
+    )
+    assert mask.tolist() == [False, True, False, True, False, True]
+    assert index.exists()
+
+
+def test_late_keys_keep_the_file_sorted(tmp_path):
+    index = KeyIndex(str(tmp_path / "index"))
+    index.add(["bitcoin"] * 2, [1_000, 3_000])
+    index.add(["bitcoin"], [2_000])
+
+    assert np.asarray(index._keys("bitcoin")).tolist() == [1_000, 2_000, 3_000]
+    assert index.filter_new(["bitcoin"] * 4, [1_000, 2_000, 2_500, 3_000]).tolist() == [False, False, True, False]
+
+
+def test_keys_persist_across_instances(tmp_path):
+    KeyIndex(str(tmp_path / "index")).add(["bitcoin"], [1_000])
+    assert KeyIndex(str(tmp_path / "index")).filter_new(["bitcoin", "bitcoin"], [1_000, 2_000]).tolist() == [False, True]
@@ -0,0 +1,48 @@
+import json
+
+import numpy as np
+
+from signal_bot.utils.market_chart import parse_market_chart, parse_ohlc, parse_series
+
+CHART = {
+    "prices": [[1700000000000, 37000.5], [1700003600000, None], [1700007200000, 37100.0]],
+    "market_caps": [[1700000000000, 7.2e11], [1700003600000, 7.3e11], [1700007200000, 7.25e11]],
+    "total_volumes": [],
+}
+
+
+def assert_matches_chart(parsed):
+    timestamps, prices = parsed["prices"]
+    assert timestamps.dtype == np.int64 and prices.dtype == np.float64
+    assert timestamps.tolist() == [1700000000000, 1700003600000, 1700007200000]
+    np.testing.assert_array_equal(prices, [37000.5, np.nan, 37100.0])
+    np.testing.assert_array_equal(parsed["market_caps"][1], [7.2e11, 7.3e11, 7.25e11])
+    assert len(parsed["total_volumes"][0]) == 0 and len(parsed["total_volumes"][1]) == 0
+
+
+def test_parses_compact_body():
+    assert_matches_chart(parse_market_chart(json.dumps(CHART, separators=(",", ":"))))
+
+
+def test_parses_whitespace_formatted_body():
+    assert_matches_chart(parse_market_chart(json.dumps(CHART)))
+    assert_matches_chart(parse_market_chart(json.dumps(CHART, indent=2)))
+
+
+def test_space_between_closing_brackets():
+    timestamps, values = parse_series('{"prices": [[1, 2e3] ,[2, 3e3] ] }', "prices")
+    assert timestamps.tolist() == [1, 2]
+    assert values.tolist() == [2000.0, 3000.0]
+
+
+def test_missing_series_is_empty():
+    timestamps, values = parse_series('{"prices": [[1, 2]]}', "total_volumes")
+    assert len(timestamps) == 0 and len(values) == 0
+
+
+def test_parses_ohlc_body():
+    body = json.dumps([[1700000000000, 1.0, 2.0, 0.5, 1.5], [1700001800000, 1.5, 1.75, 1.25, None]], indent=2)
+    candles = parse_ohlc(body)
+    assert candles["timestamp"].tolist() == [1700000000000, 1700001800000]
+    np.testing.assert_array_equal(candles["close"], [1.5, np.nan])
+    assert candles["high"].tolist() == [2.0, 1.75]
@@ -0,0 +1,41 @@
+import multiprocessing
+
+import pandas as pd
+
+from signal_bot.ml_logger import log_ml_features
+
+
+def indicator_rows(hours=48, coins=("bitcoin", "ethereum")):
+    timestamps = pd.date_range("2024-01-01", periods=hours, freq="h", tz="UTC")
+    return pd.DataFrame([
+        {"id": coin_id, "timestamp": ts, "current_price": 100.0 + i, "rsi": 50.0, "ema_20": 100.0,
+         "macd": 0.1, "bb_upper": 110.0, "bb_lower": 90.0}
+        for coin_id in coins for i, ts in enumerate(timestamps)
+    ])
+
+
+def test_appends_only_new_rows(tmp_path):
+    output_csv = str(tmp_path / "ml_training.csv")
+    rows = indicator_rows()
+
+    assert len(log_ml_features(rows.iloc[:60], output_csv)) == 60
+    assert len(log_ml_features(rows, output_csv)) == len(rows) - 60
+    assert log_ml_features(rows, output_csv).empty
+
+    logged = pd.read_csv(output_csv)
+    assert len(logged) == len(rows)
+    assert not logged.duplicated(["id", "timestamp"]).any()
+
+
+def test_concurrent_processes_log_each_row_once(tmp_path):
+    output_csv = str(tmp_path / "ml_training.csv")
+    rows = indicator_rows()
+    processes = [multiprocessing.Process(target=log_ml_features, args=(rows, output_csv)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    logged = pd.read_csv(output_csv)
+    assert len(logged) == len(rows)
+    assert not logged.duplicated(["id", "timestamp"]).any()
@@ -0,0 +1,55 @@
+import multiprocessing
+import os
+
+import pandas as pd
+
+from signal_bot.publisher import latest_path, publish_csv, read_manifest, read_published
+
+
+def generation_files(root, name):
+    return sorted(f for f in os.listdir(os.path.join(root, name)) if f.startswith("gen-"))
+
+
+def test_unpublished_dataset_reads_as_none(tmp_path):
+    assert read_manifest("top10_signals", str(tmp_path)) is None
+    assert latest_path("top10_signals", str(tmp_path)) is None
+    assert read_published("top10_signals", str(tmp_path)) is None
+
+
+def test_generations_advance_and_old_ones_are_pruned(tmp_path):
+    root = str(tmp_path)
+    for i in range(5):
+        path = publish_csv("top10_signals", pd.DataFrame({"id": ["bitcoin"], "value": [i]}), root=root, keep=3)
+
+    manifest = read_manifest("top10_signals", root)
+    assert manifest["generation"] == 5 and manifest["rows"] == 1
+    assert path == latest_path("top10_signals", root)
+    assert generation_files(root, "top10_signals") == [f"gen-{g:08d}.csv" for g in (3, 4, 5)]
+    assert read_published("top10_signals", root)["value"].tolist() == [4]
+
+
+def test_mirror_path_gets_the_same_contents(tmp_path):
+    mirror = str(tmp_path / "top10_signals.csv")
+    df = pd.DataFrame({"id": ["bitcoin", "ethereum"], "signal": ["BUY", "HOLD"]})
+    publish_csv("top10_signals", df, root=str(tmp_path / "published"), mirror_path=mirror)
+
+    pd.testing.assert_frame_equal(pd.read_csv(mirror), df)
+
+
+def _publish_many(root, writer, count):
+    for i in range(count):
+        publish_csv("top10_signals", pd.DataFrame({"writer": [writer], "i": [i]}), root=root, keep=100)
+
+
+def test_concurrent_publishers_never_share_a_generation(tmp_path):
+    root = str(tmp_path)
+    processes = [multiprocessing.Process(target=_publish_many, args=(root, writer, 10)) for writer in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    assert read_manifest("top10_signals", root)["generation"] == 40
+    published = pd.concat(pd.read_csv(os.path.join(root, "top10_signals", f)) for f in generation_files(root, "top10_signals"))
+    assert len(published) == 40
+    assert not published.duplicated(["writer", "i"]).any()
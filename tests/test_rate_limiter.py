@@ -0,0 +1,48 @@
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from signal_bot.utils import rate_limiter
+from signal_bot.utils.rate_limiter import TokenBucket, parse_retry_after
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000.0]
+    monkeypatch.setattr(rate_limiter.time, "time", lambda: now[0])
+    monkeypatch.setattr(rate_limiter.time, "sleep", lambda seconds: now.__setitem__(0, now[0] + seconds))
+    return now
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("12") == 12.0
+    assert parse_retry_after(None) == rate_limiter.DEFAULT_RETRY_AFTER
+    assert parse_retry_after("soon", default=5) == 5
+    in_30s = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert 25 <= parse_retry_after(in_30s) <= 30
+
+
+def test_burst_then_sustained_rate(tmp_path, clock):
+    bucket = TokenBucket(calls_per_minute=60, burst=3, state_path=str(tmp_path / "bucket.json"))
+
+    assert all(bucket.acquire(timeout=0) for _ in range(3))
+    assert not bucket.acquire(timeout=0)
+    assert bucket.acquire() # Sleeps one second for the next token
+    assert clock[0] == pytest.approx(1_001.0)
+
+
+def test_budget_is_shared_through_the_state_file(tmp_path, clock):
+    state_path = str(tmp_path / "bucket.json")
+    assert TokenBucket(calls_per_minute=60, state_path=state_path).acquire(timeout=0)
+    assert not TokenBucket(calls_per_minute=60, state_path=state_path).acquire(timeout=0)
+
+
+def test_block_for_pauses_every_caller(tmp_path, clock):
+    state_path = str(tmp_path / "bucket.json")
+    TokenBucket(calls_per_minute=600, state_path=state_path).block_for(30)
+    bucket = TokenBucket(calls_per_minute=600, state_path=state_path)
+
+    assert not bucket.acquire(timeout=10)
+    assert bucket.acquire()
+    assert clock[0] >= 1_030.0
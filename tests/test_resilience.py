@@ -0,0 +1,41 @@
+import pytest
+import requests
+
+from signal_bot.utils import coingecko_api
+from signal_bot.utils.resilience import CircuitBreaker
+
+
+def test_breaker_opens_after_threshold_and_recovers(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr("signal_bot.utils.resilience.time.monotonic", lambda: clock[0])
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    clock[0] += 30
+    assert breaker.allow() # The single half-open trial call
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+@pytest.mark.parametrize("error", [requests.exceptions.ConnectTimeout("timed out"), ValueError("bad adapter state")])
+def test_failed_trial_call_reopens_the_breaker(monkeypatch, error):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    monkeypatch.setattr(coingecko_api, "circuit_breaker", breaker)
+    monkeypatch.setattr(coingecko_api, "HEDGE_REQUESTS", False)
+
+    def fail(*args, **kwargs):
+        raise error
+
+    monkeypatch.setattr(coingecko_api.session, "get", fail)
+    breaker.record_failure()
+    assert breaker.allow() and breaker.state == "half_open"
+
+    with pytest.raises(type(error)):
+        coingecko_api._send("coins/markets", "coins/markets", {})
+    assert breaker.state == "open"
+    assert breaker.allow() # reset_timeout=0: the next trial goes out instead of being rejected forever
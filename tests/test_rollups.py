@@ -0,0 +1,51 @@
+import pandas as pd
+
+from signal_bot.rollups import apply_retention, build_rollups, pick_tier, query_history
+from signal_bot.snapshot_store import append_snapshot, partition_dates
+
+NOW = pd.Timestamp("2024-06-30 12:00", tz="UTC")
+
+
+def test_pick_tier_prefers_the_coarsest_fitting_tier():
+    assert pick_tier(NOW - pd.Timedelta(days=2), "1D", now=NOW)["name"] == "1d"
+    assert pick_tier(NOW - pd.Timedelta(days=2), "1h", now=NOW)["name"] == "1h"
+    assert pick_tier(NOW - pd.Timedelta(days=2), "5min", now=NOW)["name"] == "5min"
+    assert pick_tier(NOW - pd.Timedelta(days=2), "1min", now=NOW) is None # Raw snapshots
+
+
+def test_pick_tier_falls_back_to_a_retained_tier():
+    # Older than raw (14d) and 5min (30d) retention: the hourly tier still covers it
+    assert pick_tier(NOW - pd.Timedelta(days=60), "1min", now=NOW)["name"] == "1h"
+    # Older than hourly retention (365d): only the daily tier is kept
+    assert pick_tier(NOW - pd.Timedelta(days=400), "1h", now=NOW)["name"] == "1d"
+
+
+def test_rollups_fold_raw_snapshots_into_ohlc_bars(tmp_path):
+    store, root = str(tmp_path / "store"), str(tmp_path / "rollups")
+    day = pd.Timestamp.now(tz="UTC").floor("D") - pd.Timedelta(days=3) # Within every tier's retention
+    timestamps = pd.date_range(day, periods=24 * 12, freq="5min")
+    append_snapshot(pd.DataFrame({
+        "id": "bitcoin", "timestamp": timestamps, "current_price": [float(i) for i in range(len(timestamps))],
+        "total_volume": 1e6,
+    }), store)
+    build_rollups(store, root)
+
+    hourly = query_history(["bitcoin"], day, day + pd.Timedelta(hours=23), "1h", store_root=store, root=root)
+    assert hourly.attrs["tier"] == "1h"
+    assert len(hourly) == 24
+    first = hourly.iloc[0]
+    assert (first["open"], first["high"], first["low"], first["close"], first["samples"]) == (0.0, 11.0, 0.0, 11.0, 12)
+
+    daily = query_history(["bitcoin"], day, day + pd.Timedelta(hours=23), "1D", store_root=store, root=root)
+    assert daily.attrs["tier"] == "1d"
+    assert (daily.iloc[0]["open"], daily.iloc[0]["close"], daily.iloc[0]["samples"]) == (0.0, 287.0, 288)
+
+
+def test_retention_drops_rolled_up_raw_partitions(tmp_path):
+    store, root = str(tmp_path / "store"), str(tmp_path / "rollups")
+    old = pd.Timestamp.now(tz="UTC").floor("D") - pd.Timedelta(days=20)
+    append_snapshot(pd.DataFrame({"id": "bitcoin", "timestamp": [old, old + pd.Timedelta(days=19)], "current_price": 1.0}), store)
+    build_rollups(store, root)
+    apply_retention(store, root)
+
+    assert partition_dates(store) == [(old + pd.Timedelta(days=19)).strftime("%Y-%m-%d")]
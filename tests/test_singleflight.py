@@ -0,0 +1,48 @@
+import threading
+import time
+
+import pytest
+
+from signal_bot.utils.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {"price": 1.0}
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("btc", fetch)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(flight.do("btc", fetch))) for _ in range(4)]
+    for thread in followers:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while flight.shared < 4 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+
+    assert len(calls) == 1 and flight.executed == 1 and flight.shared == 4
+    assert len(results) == 5 and all(result is results[0] for result in results)
+
+
+def test_later_calls_run_again_and_errors_are_not_cached():
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError("upstream error")
+
+    with pytest.raises(ValueError):
+        flight.do("btc", fail)
+    assert flight.do("btc", lambda: 1) == 1
+    assert flight.do("btc", lambda: 2) == 2
+    assert flight.executed == 3
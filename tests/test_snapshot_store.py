@@ -0,0 +1,68 @@
+import os
+
+import pandas as pd
+
+from signal_bot.snapshot_store import (
+    PRICE_TICKS_DIR, TICK_SCHEMA, append_snapshot, compact_snapshots, iter_snapshots, partition_dates, read_snapshots,
+)
+
+
+def snapshot(start, hours, coins=("bitcoin", "ethereum")):
+    timestamps = pd.date_range(start, periods=hours, freq="h", tz="UTC")
+    return pd.DataFrame([
+        {"id": coin_id, "timestamp": ts, "current_price": 100.0 + i, "total_volume": 1e6}
+        for i, ts in enumerate(timestamps) for coin_id in coins
+    ])
+
+
+def test_rows_land_in_their_utc_date_partition(tmp_path):
+    root = str(tmp_path / "store")
+    written = append_snapshot(snapshot("2024-01-01 20:00", 8), root)
+
+    assert partition_dates(root) == ["2024-01-01", "2024-01-02"]
+    assert len(written) == 2
+    assert len(read_snapshots(root)) == 16
+
+
+def test_time_range_and_columns_are_pushed_down(tmp_path):
+    root = str(tmp_path / "store")
+    append_snapshot(snapshot("2024-01-01 20:00", 8), root)
+
+    rows = read_snapshots(root, columns=["id", "current_price"], start="2024-01-02 00:00", end="2024-01-02 01:00")
+    assert list(rows.columns) == ["id", "current_price"]
+    assert len(rows) == 4
+    assert read_snapshots(str(tmp_path / "empty")).empty
+
+
+def test_compaction_keeps_every_row_once(tmp_path):
+    root = str(tmp_path / "store")
+    for hour in range(3):
+        append_snapshot(snapshot(f"2024-01-01 0{hour}:00", 1), root)
+
+    assert compact_snapshots(root, grace_seconds=0)["compacted"] == 1
+    partition = os.path.join(root, "date=2024-01-01")
+    compact_snapshots(root, grace_seconds=0) # Superseded part files go on the next run
+    assert [name.split("-")[0] for name in os.listdir(partition)] == ["compacted"]
+
+    rows = read_snapshots(root)
+    assert len(rows) == 6 and not rows.duplicated(["id", "timestamp"]).any()
+
+
+def test_ticks_use_their_own_schema(tmp_path):
+    root = str(tmp_path / os.path.basename(PRICE_TICKS_DIR))
+    ticks = snapshot("2024-01-01", 2).assign(price_change_percentage_24h=1.5)
+    append_snapshot(ticks, root, TICK_SCHEMA)
+
+    rows = read_snapshots(root, schema=TICK_SCHEMA)
+    assert list(rows.columns) == TICK_SCHEMA.names
+    assert rows["price_change_percentage_24h"].tolist() == [1.5] * 4
+
+
+def test_iter_snapshots_caps_chunks_at_batch_rows(tmp_path):
+    root = str(tmp_path / "store")
+    for day in range(1, 6):
+        append_snapshot(snapshot(f"2024-01-0{day}", 24, coins=[f"coin-{i}" for i in range(10)]), root) # 240 rows a day
+    chunks = list(iter_snapshots(root, batch_rows=100))
+
+    assert [len(chunk) for chunk in chunks] == [100] * 12
+    assert len(pd.concat(chunks).drop_duplicates(["id", "timestamp"])) == 1_200
@@ -0,0 +1,54 @@
+import os
+
+from signal_bot.stage_manifest import StageManifest
+
+
+def write(path, text):
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def test_stage_is_fresh_until_an_input_or_param_changes(tmp_path):
+    source, output = str(tmp_path / "in.csv"), str(tmp_path / "out.csv")
+    write(source, "id,price\nbitcoin,1\n")
+    write(output, "done")
+    manifest = StageManifest(str(tmp_path / "manifest.json"))
+
+    fresh, fingerprints = manifest.check("indicators", [source], {"window": 14}, [output])
+    assert not fresh
+    manifest.record("indicators", fingerprints, {"window": 14}, [output])
+
+    # A new manifest instance reads the recorded state back from disk
+    manifest = StageManifest(str(tmp_path / "manifest.json"))
+    assert manifest.check("indicators", [source], {"window": 14}, [output])[0]
+    assert not manifest.check("indicators", [source], {"window": 20}, [output])[0]
+
+    write(source, "id,price\nbitcoin,2\n")
+    assert not manifest.check("indicators", [source], {"window": 14}, [output])[0]
+
+
+def test_rewrite_with_same_bytes_stays_fresh(tmp_path):
+    source, output = str(tmp_path / "in.csv"), str(tmp_path / "out.csv")
+    write(source, "id,price\nbitcoin,1\n")
+    write(output, "done")
+    manifest = StageManifest(str(tmp_path / "manifest.json"))
+    manifest.record("signals", manifest.check("signals", [source], outputs=[output])[1], outputs=[output])
+
+    stat = os.stat(source)
+    write(source, "id,price\nbitcoin,1\n")
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert manifest.check("signals", [source], outputs=[output])[0]
+
+
+def test_missing_output_or_input_makes_the_stage_stale(tmp_path):
+    source, output = str(tmp_path / "in.csv"), str(tmp_path / "out.csv")
+    write(source, "x")
+    write(output, "done")
+    manifest = StageManifest(str(tmp_path / "manifest.json"))
+    manifest.record("ml_features", manifest.check("ml_features", [source], outputs=[output])[1], outputs=[output])
+
+    os.remove(output)
+    assert not manifest.check("ml_features", [source], outputs=[output])[0]
+    write(output, "done")
+    os.remove(source)
+    assert not manifest.check("ml_features", [source], outputs=[output])[0]
@@ -0,0 +1,61 @@
+import multiprocessing
+
+import numpy as np
+
+from signal_bot.timeseries_store import TimeSeriesStore
+
+
+def columns(start_ms, count):
+    timestamps = start_ms + 3_600_000 * np.arange(count, dtype=np.int64)
+    return {"timestamp": timestamps, "current_price": 100.0 + np.arange(count), "market_cap": np.full(count, 1e9)}
+
+
+def test_appends_only_newer_timestamps(tmp_path):
+    store = TimeSeriesStore(str(tmp_path))
+    assert store.append("bitcoin", columns(0, 5)) == 5
+    assert store.append("bitcoin", columns(2 * 3_600_000, 5)) == 2 # Rows 2-4 are already stored
+
+    stored = store.open("bitcoin")
+    assert stored["timestamp"].tolist() == [3_600_000 * i for i in range(7)]
+    assert np.isnan(stored["total_volume"]).all() # Missing fields are stored as NaN
+
+
+def test_slice_bounds_are_inclusive(tmp_path):
+    store = TimeSeriesStore(str(tmp_path))
+    store.append("bitcoin", columns(0, 10))
+
+    window = store.slice("bitcoin", start=2 * 3_600_000, end=4 * 3_600_000)
+    assert window["current_price"].tolist() == [102.0, 103.0, 104.0]
+    frame = store.to_frame("bitcoin", start="1970-01-01 08:00")
+    assert len(frame) == 2 and str(frame["timestamp"].iloc[0]) == "1970-01-01 08:00:00"
+
+
+def test_interrupted_append_is_repaired(tmp_path):
+    store = TimeSeriesStore(str(tmp_path))
+    store.append("bitcoin", columns(0, 3))
+    with open(store.path("bitcoin", "current_price"), "ab") as f:
+        f.write(np.float64(999.0).tobytes()) # A value without its timestamp, as after a crash mid-append
+
+    assert store.length("bitcoin") == 3
+    assert store.append("bitcoin", columns(3 * 3_600_000, 1)) == 1
+    assert store.open("bitcoin")["current_price"].tolist() == [100.0, 101.0, 102.0, 100.0]
+
+
+def _append_batches(root, offset):
+    store = TimeSeriesStore(root)
+    for i in range(20):
+        store.append("bitcoin", columns((offset + 2 * i) * 3_600_000, 2))
+
+
+def test_concurrent_processes_keep_rows_aligned(tmp_path):
+    root = str(tmp_path)
+    processes = [multiprocessing.Process(target=_append_batches, args=(root, offset)) for offset in range(3)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    store = TimeSeriesStore(root)
+    stored = store.open("bitcoin")
+    assert all(len(values) == store.length("bitcoin") for values in stored.values())
+    assert (np.diff(stored["timestamp"]) > 0).all()